@@ -21,9 +21,14 @@ from .constants import (
     Grade,
     Mods,
     Mode,
+    Priority,
 )
 
 from . import constants
 from . import packets
+from . import aggregator
+from . import framing
+from . import outbound
+from . import schema
 from . import streams
 from . import client
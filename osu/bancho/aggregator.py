@@ -0,0 +1,113 @@
+from collections.abc import Iterable
+
+import time
+
+
+class RequestAggregator:
+    """RequestAggregator
+    --------------------
+    Collects the player ids of presence or stats requests, until they are flushed.
+
+    Ids that are already pending are only requested once. Requested ids that
+    were answered by a packet within the last `cooldown` seconds are dropped
+    entirely. On flush, the pending ids are split into chunks of `chunk_size`.
+
+    Attributes:
+        `pending`: dict[int, None] (Pending ids, in the order they were requested)
+
+        `requested`: dict[int, float] (Monotonic time of the flush of every unanswered id)
+
+        `satisfied`: dict[int, float] (Monotonic time of the last answer of every id)
+
+        `cooldown`: float
+
+        `chunk_size`: int
+    """
+
+    def __init__(self, cooldown: float = 5.0, chunk_size: int = 255) -> None:
+        self.pending: dict[int, None] = {}
+        self.requested: dict[int, float] = {}
+        self.satisfied: dict[int, float] = {}
+        self.cooldown = cooldown
+        self.chunk_size = chunk_size
+        self.prune_size = 4096
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def add(self, ids: Iterable[int]) -> None:
+        """Add ids to the next request"""
+        now = time.monotonic()
+
+        for id in ids:
+            if id in self.pending:
+                continue
+
+            if now - self.satisfied.get(id, -self.cooldown) < self.cooldown:
+                # Update was received recently
+                continue
+
+            self.pending[id] = None
+
+    def discard(self, ids: Iterable[int]) -> None:
+        """Remove ids from the next request, e.g. after their players were evicted"""
+        for id in ids:
+            self.pending.pop(id, None)
+
+    def satisfy(self, id: int) -> None:
+        """Mark an id as updated, after its packet was received"""
+        requested = self.requested.pop(id, None) is not None
+
+        if id in self.pending:
+            del self.pending[id]
+
+        elif not requested:
+            # Update was not requested by us
+            return
+
+        self.satisfied.pop(id, None)
+        self.satisfied[id] = time.monotonic()
+
+        if len(self.satisfied) + len(self.requested) > self.prune_size:
+            self.prune()
+
+    def prune(self) -> None:
+        """Forget ids that are past their cooldown"""
+        deadline = time.monotonic() - self.cooldown
+
+        # Ids are kept in the order they were satisfied or requested in
+        for times in (self.satisfied, self.requested):
+            while times:
+                id, timestamp = next(iter(times.items()))
+
+                if timestamp >= deadline:
+                    break
+
+                del times[id]
+
+        # Spread out the next prune, if most ids are still fresh
+        self.prune_size = max(4096, 2 * (len(self.satisfied) + len(self.requested)))
+
+    def flush(self) -> list[list[int]]:
+        """Get all pending ids in chunks, and clear them"""
+        if not self.pending:
+            return []
+
+        ids = list(self.pending)
+        self.pending.clear()
+
+        now = time.monotonic()
+
+        for id in ids:
+            self.requested.pop(id, None)
+            self.requested[id] = now
+
+        return [
+            ids[i : i + self.chunk_size] for i in range(0, len(ids), self.chunk_size)
+        ]
+
+    def reset(self) -> None:
+        self.pending.clear()
+        self.requested.clear()
+        self.satisfied.clear()
+        self.prune_size = 4096
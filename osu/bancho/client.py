@@ -1,12 +1,21 @@
 from typing import TYPE_CHECKING
 from datetime import datetime
 
-from .constants import ClientPackets, ReplayAction, StatusAction, Privileges
+from .constants import (
+    ClientPackets,
+    PacketPriorities,
+    Priority,
+    ReplayAction,
+    StatusAction,
+    Privileges,
+)
 from .connector_http import HttpBanchoConnector
 from .connector import BanchoConnector
+from .aggregator import RequestAggregator
+from .framing import HEADER
 from .streams import StreamOut
 
-from ..objects.replays import ReplayFrame, ScoreFrame
+from ..objects.replays import ReplayFrame, ReplayFrameSchema, ScoreFrame
 from ..objects.collections import Players, Channels, Matches
 from ..objects.match import Match
 from ..objects.player import Player
@@ -71,6 +80,10 @@ class BanchoClient:
 
         `connector`: osu.bancho.connectors.BanchoConnector
 
+        `presence_requests`: osu.bancho.aggregator.RequestAggregator
+
+        `stats_requests`: osu.bancho.aggregator.RequestAggregator
+
     Functions:
         `set_connector`: Set the transport connector used by the client
 
@@ -82,6 +95,8 @@ class BanchoClient:
 
         `request_stats`: Request a stats update for a list of players
 
+        `flush_requests`: Send all pending presence & stats requests
+
         `request_status`: Request a status update for your account
 
         `update_status`: Update `player.status`
@@ -121,7 +136,10 @@ class BanchoClient:
 
         self.channels = Channels()
         self.matches = Matches(game)
-        self.players = Players(game)
+        self.players = Players(game, compact=game.compact_players)
+
+        self.presence_requests = RequestAggregator()
+        self.stats_requests = RequestAggregator()
 
         self.ping_count = 0
         self.protocol = 0
@@ -199,7 +217,15 @@ class BanchoClient:
 
         self.channels = Channels()
         self.matches = Matches(self.game)
-        self.players = Players(self.game)
+        self.players = Players(
+            self.game,
+            compact=self.game.compact_players,
+            capacity=self.players.capacity,
+            ttl=self.players.ttl,
+        )
+
+        self.presence_requests.reset()
+        self.stats_requests.reset()
 
         self.ping_count = 0
         self.fast_read = False
@@ -216,7 +242,9 @@ class BanchoClient:
 
     def dequeue(self) -> None:
         """Receive packets and flush any connector-specific queue."""
+        self.flush_requests()
         self.connector.receive()
+        self.players.evict()
 
     def exit(self) -> None:
         """Send logout packet to bancho, and disconnect."""
@@ -245,16 +273,21 @@ class BanchoClient:
         self.connector.bind(self)
 
     def enqueue(
-        self, packet: ClientPackets, data: bytes = b"", dequeue: bool | None = None
+        self,
+        packet: ClientPackets,
+        data: bytes = b"",
+        dequeue: bool | None = None,
+        priority: Priority | None = None,
     ) -> bytes:
-        """Send a packet through the active connector."""
+        """Send a packet through the active connector.
 
-        stream = StreamOut()
+        The priority defaults to the class of the packet in `PacketPriorities`.
+        """
+
+        stream = StreamOut(capacity=HEADER.size + len(data))
 
         # Construct header
-        stream.u16(packet.value)
-        stream.bool(False)
-        stream.u32(len(data))
+        stream.pack(HEADER, packet.value, False, len(data))
         stream.write(data)
 
         self.logger.debug(f'Sending {packet.name} -> "%s"', data)
@@ -264,7 +297,10 @@ class BanchoClient:
         if dequeue is None:
             dequeue = self.connector.dequeue_on_enqueue
 
-        self.connector.send(packet_data, dequeue)
+        if priority is None:
+            priority = PacketPriorities.get(packet, Priority.Control)
+
+        self.connector.send(packet_data, dequeue, priority)
 
         return packet_data
 
@@ -282,18 +318,37 @@ class BanchoClient:
         self.enqueue(ClientPackets.PING)
 
     def request_presence(self, ids: list[int]) -> None:
-        """Request the presence of a list of players"""
-        stream = StreamOut()
-        stream.intlist(ids)
+        """Request the presence of a list of players
 
-        self.enqueue(ClientPackets.USER_PRESENCE_REQUEST, stream.get())
+        Requests are collected and sent on the next `flush_requests` call.
+        Players that are already pending, or were updated recently, are skipped.
+        """
+        self.presence_requests.add(ids)
 
     def request_stats(self, ids: list[int]) -> None:
-        """Request the stats of a list of players"""
-        stream = StreamOut()
-        stream.intlist(ids)
+        """Request the stats of a list of players
+
+        Requests are collected and sent on the next `flush_requests` call.
+        Players that are already pending, or were updated recently, are skipped.
+        """
+        self.stats_requests.add(ids)
 
-        self.enqueue(ClientPackets.USER_STATS_REQUEST, stream.get())
+    def flush_requests(self) -> None:
+        """Queue all pending presence & stats requests, in chunks of 255 players
+
+        The requests are sent together with the next batch of the connector.
+        """
+        for ids in self.presence_requests.flush():
+            stream = StreamOut()
+            stream.intlist(ids)
+            self.enqueue(
+                ClientPackets.USER_PRESENCE_REQUEST, stream.get(), dequeue=False
+            )
+
+        for ids in self.stats_requests.flush():
+            stream = StreamOut()
+            stream.intlist(ids)
+            self.enqueue(ClientPackets.USER_STATS_REQUEST, stream.get(), dequeue=False)
 
     def request_status(self) -> None:
         """Request a status update for the connected player"""
@@ -398,14 +453,17 @@ class BanchoClient:
         else:
             extra = seed
 
-        stream = StreamOut()
+        stream = StreamOut(capacity=64 + len(frames) * ReplayFrameSchema.size)
         stream.s32(extra)
         stream.u16(len(frames))
-        [stream.write(frame.encode()) for frame in frames]
+
+        for frame in frames:
+            frame.encode_into(stream)
+
         stream.u8(action.value)
 
         if score_frame:
-            stream.write(score_frame.encode())
+            score_frame.encode_into(stream)
 
         self.enqueue(ClientPackets.SPECTATE_FRAMES, stream.get())
 
@@ -1,9 +1,9 @@
 from typing import TYPE_CHECKING
 from abc import ABC, abstractmethod
 from datetime import datetime
-from queue import Queue
 
-from .constants import ServerPackets
+from .outbound import OutboundQueue, OutboundStage
+from .constants import Priority, ServerPackets
 from .streams import StreamIn
 
 if TYPE_CHECKING:
@@ -16,12 +16,20 @@ import time
 
 
 class BanchoConnector(ABC):
-    """Transport layer used by BanchoClient."""
+    """Transport layer used by BanchoClient.
+
+    Outgoing packets are put into `queue`, which is drained by priority.
+    Every batch is passed through `stages` before it is flushed. Each stage
+    receives the list of queued packets, and returns the packets that should
+    be sent, e.g. `osu.bancho.outbound.collapse_packets`.
+    """
 
     dequeue_on_enqueue = True
 
     def __init__(self) -> None:
         self._bancho: BanchoClient | None = None
+        self.stages: list[OutboundStage] = []
+        self.queue = OutboundQueue()
 
     def bind(self, bancho: "BanchoClient") -> None:
         self._bancho = bancho
@@ -37,6 +45,20 @@ class BanchoConnector(ABC):
     def game(self):
         return self.bancho.game
 
+    def next_batch(self) -> list[bytes]:
+        """Drain the queue and pass the packets through every outbound stage"""
+        if self.queue.empty():
+            return []
+
+        return self.process_outbound(self.queue.drain())
+
+    def process_outbound(self, packets: list[bytes]) -> list[bytes]:
+        """Pass a batch of queued packets through every outbound stage"""
+        for stage in self.stages:
+            packets = stage(packets)
+
+        return packets
+
     def wait(self) -> None:
         """Wait until the next receive cycle."""
 
@@ -45,7 +67,9 @@ class BanchoConnector(ABC):
         """Connect to bancho."""
 
     @abstractmethod
-    def send(self, data: bytes, dequeue: bool) -> None:
+    def send(
+        self, data: bytes, dequeue: bool, priority: Priority = Priority.Control
+    ) -> None:
         """Push packet data to bancho."""
 
     @abstractmethod
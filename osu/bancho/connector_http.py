@@ -1,9 +1,11 @@
 from typing import TYPE_CHECKING
 from datetime import datetime
-from queue import Queue
+from threading import Event
 
 from .connector import BanchoConnector
-from .constants import ServerPackets
+from .framing import PacketParser
+from .outbound import collapse_packets
+from .constants import Priority, ServerPackets
 from .streams import StreamIn
 
 if TYPE_CHECKING:
@@ -15,14 +17,49 @@ import time
 
 
 class HttpBanchoConnector(BanchoConnector):
-    def __init__(self, domain: str | None = None) -> None:
+    """Connector that polls bancho over HTTP
+
+    Between two polls, `wait` blocks until the request interval has passed,
+    or until a packet was enqueued. In that case, it waits for another
+    `debounce` seconds, so that packets sent in quick succession share a request.
+
+    When `adaptive` is enabled, the interval is shortened to follow the measured
+    rate of incoming packets, but it will never be shorter than `min_interval`,
+    which defaults to the `min_idletime` of the client.
+
+    When `stream` is enabled, response bodies are read in chunks of `chunk_size`
+    and packets are handled as soon as they arrive, instead of waiting for
+    the whole response to be downloaded first.
+    """
+
+    def __init__(
+        self,
+        domain: str | None = None,
+        debounce: float = 0.05,
+        adaptive: bool = False,
+        min_interval: float | None = None,
+        stream: bool = False,
+        chunk_size: int = 65536,
+    ) -> None:
         super().__init__()
         self._domain = domain
         self.domain = domain or ""
         self.url = f"https://{self.domain}" if self.domain else ""
         self.session = requests.Session()
-        self.queue: Queue[bytes] = Queue()
+        self.stages.append(collapse_packets)
         self.token = ""
+        self.stream = stream
+        self.chunk_size = chunk_size
+
+        self.wakeup = Event()
+        self.debounce = debounce
+        self.adaptive = adaptive
+        self.min_interval = min_interval
+
+        # Exponentially weighted average of incoming packets per second
+        self.packet_rate = 0.0
+        self.smoothing = 0.3
+        self.last_receive = time.monotonic()
 
     def bind(self, bancho: "BanchoClient") -> None:
         super().bind(bancho)
@@ -40,16 +77,77 @@ class HttpBanchoConnector(BanchoConnector):
             }
         )
 
+    @property
+    def interval(self) -> float:
+        """Time to wait until the next poll"""
+        interval = self.bancho.request_interval
+
+        if not self.adaptive or self.packet_rate <= 0:
+            return interval
+
+        min_interval = (
+            self.min_interval
+            if self.min_interval is not None
+            else self.bancho.min_idletime
+        )
+
+        # Poll about as often as packets are coming in
+        return min(interval, max(min_interval, 1 / self.packet_rate))
+
     def wait(self) -> None:
-        time.sleep(self.bancho.request_interval)
+        self.wakeup.clear()
+
+        # Time until a queued packet is allowed to be sent
+        delay = self.queue.delay()
+
+        if delay <= 0:
+            # Packets are still waiting from the last cycle
+            self.wakeup.set()
+
+        if self.wakeup.wait(min(self.interval, delay)) and self.debounce > 0:
+            # Give other packets a chance to be sent in the same request
+            time.sleep(self.debounce)
+
+    def update_rate(self, count: int) -> None:
+        """Add a sample of received packets to the packet rate"""
+        now = time.monotonic()
+        elapsed = max(now - self.last_receive, 1e-3)
+        self.last_receive = now
+
+        self.packet_rate += self.smoothing * (count / elapsed - self.packet_rate)
+
+    def post(self, data: bytes | str) -> requests.Response:
+        return self.session.post(self.url, data=data, stream=self.stream)
+
+    def read_response(self, response: requests.Response) -> int:
+        """Handle the packets of a response, and return the amount of received packets"""
+        if not self.stream:
+            return self.game.packets.data_received(response.content, self.game)
+
+        parser = PacketParser()
+        count = 0
+
+        with response:
+            for chunk in response.iter_content(self.chunk_size):
+                count += self.game.packets.process_packets(
+                    parser.feed(chunk), self.game
+                )
+
+        if parser.pending:
+            self.bancho.logger.warning(
+                f"Response ended with an incomplete packet ({parser.pending} bytes)"
+            )
+
+        return count
 
     def connect(self) -> None:
         """Perform the initial connection to get a connection token."""
         data = f"{self.game.username}\n{self.game.password_hash}\n{self.game.client}\n"
 
-        response = self.session.post(self.url, data=data)
+        response = self.post(data)
 
         if not response.ok:
+            response.close()
             self.bancho.connected = False
             self.bancho.retry = True
             self.bancho.logger.error(
@@ -61,7 +159,7 @@ class HttpBanchoConnector(BanchoConnector):
             self.bancho.logger.debug("Connection token missing from login response")
             self.bancho.connected = False
             self.bancho.retry = False
-            self.game.packets.data_received(response.content, self.game)
+            self.read_response(response)
             return
 
         self.bancho.logger.debug(f"Received session token: {token}")
@@ -69,13 +167,19 @@ class HttpBanchoConnector(BanchoConnector):
         self.token = token
 
         self.session.headers["osu-token"] = self.token
-        self.game.packets.data_received(response.content, self.game)
+        self.read_response(response)
 
-    def send(self, data: bytes, dequeue: bool) -> None:
-        self.queue.put(data)
+    def send(
+        self, data: bytes, dequeue: bool, priority: Priority = Priority.Control
+    ) -> None:
+        self.queue.put(data, priority)
 
         if dequeue:
             self.receive()
+            return
+
+        # Let the polling thread send it with the next request
+        self.wakeup.set()
 
     def receive(self) -> None:
         """Send queued packets and handle incoming packets."""
@@ -89,14 +193,10 @@ class HttpBanchoConnector(BanchoConnector):
         if self.queue.qsize() > 1:
             self.bancho.ping_count = 0
 
-        packets: list[bytes] = []
-
-        while not self.queue.empty():
-            packets.append(self.queue.get())
-
-        response = self.session.post(self.url, data=b"".join(packets))
+        response = self.post(b"".join(self.next_batch()))
 
         if not response.ok:
+            response.close()
             self.bancho.connected = False
             self.bancho.retry = True
             self.bancho.logger.error(
@@ -105,15 +205,15 @@ class HttpBanchoConnector(BanchoConnector):
             return
 
         self.bancho.fast_read = False
-        self.game.packets.data_received(response.content, self.game)
+        self.update_rate(self.read_response(response))
         self.bancho.last_action = datetime.now().timestamp()
 
     def reset(self) -> None:
         self.token = ""
         self.session.headers.pop("osu-token", None)
+        self.packet_rate = 0.0
 
-        while not self.queue.empty():
-            self.queue.get()
+        self.queue.clear()
 
     def close(self) -> None:
         self.session.close()
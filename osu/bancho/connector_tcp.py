@@ -1,12 +1,12 @@
 from datetime import datetime
 
 from .connector import BanchoConnector
-from .constants import ServerPackets
-from .streams import StreamIn
+from .framing import PacketParser
+from .outbound import collapse_packets
+from .constants import Priority
 
 import socket
 import select
-import gzip
 
 
 class TcpBanchoConnector(BanchoConnector):
@@ -15,6 +15,13 @@ class TcpBanchoConnector(BanchoConnector):
     def __init__(self, ip: str, port: int = 13381) -> None:
         super().__init__()
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.parser = PacketParser()
+        self.stages.append(collapse_packets)
+        self.chunk_size = 65536
+
+        # Maximum time to block on the socket, before rate
+        # limited packets in the queue are flushed again
+        self.flush_interval = 1.0
         self.ip = ip
         self.port = port
 
@@ -35,36 +42,34 @@ class TcpBanchoConnector(BanchoConnector):
             self.bancho.retry = True
             self.bancho.logger.error("Connection refused by the server.")
 
-    def send(self, data: bytes, dequeue: bool) -> None:
+    def send(
+        self, data: bytes, dequeue: bool, priority: Priority = Priority.Control
+    ) -> None:
         if not self.bancho.connected:
             return
 
-        self.socket.sendall(data)
-        self.bancho.last_action = datetime.now().timestamp()
+        self.queue.put(data, priority)
+        self.flush()
 
         if dequeue:
             self.receive()
 
+    def flush(self) -> None:
+        """Send every queued packet, that is allowed by the rate limits"""
+        # Packets after a `Final` barrier are drained in the next batch
+        while packets := self.next_batch():
+            self.socket.sendall(b"".join(packets))
+            self.bancho.last_action = datetime.now().timestamp()
+
     def process_packets(self) -> None:
         """Process incoming packets from the server."""
-        packet_header = StreamIn(self.socket.recv(7, socket.MSG_WAITALL))
+        data = self.socket.recv(self.chunk_size)
 
-        if packet_header.eof():
+        if not data:
             self.bancho.connected = False
             return
 
-        packet_id = packet_header.u16()
-        compression = packet_header.bool()
-        packet_size = packet_header.u32()
-        packet_data = self.socket.recv(packet_size, socket.MSG_WAITALL)
-
-        if compression:
-            packet_data = gzip.decompress(packet_data)
-
-        packet, stream = ServerPackets(packet_id), StreamIn(packet_data)
-
-        self.bancho.logger.debug(f'Received packet {packet.name} -> "%s"', packet_data)
-        self.game.packets.packet_received(packet, stream, self.game)
+        self.game.packets.process_packets(self.parser.feed(data), self.game)
 
     def receive(self) -> None:
         """Process incoming packets from the server."""
@@ -72,6 +77,12 @@ class TcpBanchoConnector(BanchoConnector):
             return
 
         try:
+            self.flush()
+
+            while self.bancho.connected and not self.wait_readable():
+                # Release packets that were held back by a rate limit
+                self.flush()
+
             self.process_packets()
 
             while self.bancho.connected and self.has_pending_data():
@@ -81,12 +92,20 @@ class TcpBanchoConnector(BanchoConnector):
             self.bancho.connected = False
             self.bancho.retry = True
 
+    def wait_readable(self) -> bool:
+        """Wait until data arrives, or until the next queued packet can be sent"""
+        timeout = min(self.queue.delay(), self.flush_interval)
+        readable, _, _ = select.select([self.socket], [], [], timeout)
+        return bool(readable)
+
     def has_pending_data(self) -> bool:
         readable, _, _ = select.select([self.socket], [], [], 0)
         return bool(readable)
 
     def reset(self) -> None:
         self.close()
+        self.parser.reset()
+        self.queue.clear()
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 
     def close(self) -> None:
@@ -3,6 +3,9 @@ from inspect import signature
 from typing import Any
 
 from .connector import BanchoConnector
+from .framing import PacketParser
+from .outbound import collapse_packets
+from .constants import Priority
 
 
 class WebsocketBanchoConnector(BanchoConnector):
@@ -30,6 +33,12 @@ class WebsocketBanchoConnector(BanchoConnector):
         self.close_timeout = close_timeout
         self.url = url or ""
         self.websocket: Any | None = None
+        self.parser = PacketParser()
+        self.stages.append(collapse_packets)
+
+        # Maximum time to block on the websocket, before rate
+        # limited packets in the queue are flushed again
+        self.flush_interval = 1.0
 
     def bind(self, bancho) -> None:
         super().bind(bancho)
@@ -76,16 +85,25 @@ class WebsocketBanchoConnector(BanchoConnector):
         self.websocket.send(login_data.encode())
         self.bancho.connected = True
 
-    def send(self, data: bytes, dequeue: bool) -> None:
+    def send(
+        self, data: bytes, dequeue: bool, priority: Priority = Priority.Control
+    ) -> None:
         if not self.bancho.connected or not self.websocket:
             return
 
-        self.websocket.send(data)
-        self.bancho.last_action = datetime.now().timestamp()
+        self.queue.put(data, priority)
+        self.flush()
 
         if dequeue:
             self.receive()
 
+    def flush(self) -> None:
+        """Send every queued packet, that is allowed by the rate limits"""
+        # Packets after a `Final` barrier are drained in the next batch
+        while self.websocket and (packets := self.next_batch()):
+            self.websocket.send(b"".join(packets))
+            self.bancho.last_action = datetime.now().timestamp()
+
     def receive(self) -> None:
         """Process incoming websocket messages from the server."""
         if not self.bancho.connected or not self.websocket:
@@ -94,7 +112,17 @@ class WebsocketBanchoConnector(BanchoConnector):
         ConnectionClosed = self.load_connection_closed()
 
         try:
-            self.process_message()
+            self.flush()
+
+            while self.bancho.connected:
+                try:
+                    self.process_message(
+                        timeout=min(self.queue.delay(), self.flush_interval)
+                    )
+                    break
+                except TimeoutError:
+                    # Release packets that were held back by a rate limit
+                    self.flush()
 
             while self.bancho.connected:
                 try:
@@ -118,10 +146,12 @@ class WebsocketBanchoConnector(BanchoConnector):
         if not data:
             return
 
-        self.game.packets.data_received(data, self.game)
+        self.game.packets.process_packets(self.parser.feed(data), self.game)
 
     def reset(self) -> None:
         self.close()
+        self.parser.reset()
+        self.queue.clear()
 
     def close(self) -> None:
         if not self.websocket:
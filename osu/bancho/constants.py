@@ -320,51 +320,61 @@ class Mods(IntFlag):
 
     @property
     def members(self) -> list:
-        return [flag for flag in Mods if self & flag]
+        return list(resolve_mods(self)[0])
 
     @property
     def acronyms(self) -> list[str]:
-        return [
-            {
-                Mods.NoFail: "NF",
-                Mods.Easy: "EZ",
-                Mods.Hidden: "HD",
-                Mods.HardRock: "HR",
-                Mods.SuddenDeath: "SD",
-                Mods.DoubleTime: "DT",
-                Mods.Relax: "Relax",
-                Mods.HalfTime: "HT",
-                Mods.Nightcore: "NC",
-                Mods.Flashlight: "FL",
-                Mods.SpunOut: "SO",
-                Mods.Autopilot: "AP",
-                Mods.Perfect: "PF",
-                Mods.Key1: "K1",
-                Mods.Key2: "K2",
-                Mods.Key3: "K3",
-                Mods.Key4: "K4",
-                Mods.Key5: "K5",
-                Mods.Key6: "K6",
-                Mods.Key7: "K7",
-                Mods.Key8: "K8",
-                Mods.KeyCoop: "2P",
-                Mods.FadeIn: "FI",
-                Mods.Random: "RD",
-                Mods.ScoreV2: "ScoreV2",
-                Mods.Cinema: "Cinema",
-                Mods.Autoplay: "Auto",
-                Mods.Target: "TP",
-            }[mod]
-            for mod in self.members
-            if mod
-            not in [
-                Mods.ScoreIncreaseMods,
-                Mods.FreeModAllowed,
-                Mods.LastMod,
-                Mods.KeyMod,
-                Mods.NoMod,
-            ]
-        ]
+        return list(resolve_mods(self)[1])
+
+
+ModAcronyms = {
+    Mods.NoFail: "NF",
+    Mods.Easy: "EZ",
+    Mods.Hidden: "HD",
+    Mods.HardRock: "HR",
+    Mods.SuddenDeath: "SD",
+    Mods.DoubleTime: "DT",
+    Mods.Relax: "Relax",
+    Mods.HalfTime: "HT",
+    Mods.Nightcore: "NC",
+    Mods.Flashlight: "FL",
+    Mods.SpunOut: "SO",
+    Mods.Autopilot: "AP",
+    Mods.Perfect: "PF",
+    Mods.Key1: "K1",
+    Mods.Key2: "K2",
+    Mods.Key3: "K3",
+    Mods.Key4: "K4",
+    Mods.Key5: "K5",
+    Mods.Key6: "K6",
+    Mods.Key7: "K7",
+    Mods.Key8: "K8",
+    Mods.KeyCoop: "2P",
+    Mods.FadeIn: "FI",
+    Mods.Random: "RD",
+    Mods.ScoreV2: "ScoreV2",
+    Mods.Cinema: "Cinema",
+    Mods.Autoplay: "Auto",
+    Mods.Target: "TP",
+}
+
+# Mod value -> (members, acronyms)
+ModsCache: dict[int, tuple[tuple[Mods, ...], tuple[str, ...]]] = {}
+
+
+def resolve_mods(mods: Mods) -> tuple[tuple[Mods, ...], tuple[str, ...]]:
+    """Get the members & acronyms of a mod combination, from the lookup cache"""
+    if (cached := ModsCache.get(mods.value)) is not None:
+        return cached
+
+    members = tuple(flag for flag in Mods if mods & flag)
+    acronyms = tuple(ModAcronyms[mod] for mod in members if mod in ModAcronyms)
+
+    if len(ModsCache) >= 4096:
+        ModsCache.clear()
+
+    ModsCache[mods.value] = (members, acronyms)
+    return members, acronyms
 
 
 class Privileges(IntFlag):
@@ -448,6 +458,15 @@ class PresenceFilter(Enum):
     Friends = 2
 
 
+class Priority(IntEnum):
+    Control = 0
+    Match = 1
+    Chat = 2
+    Frames = 3
+    Bulk = 4
+    Final = 5
+
+
 class Grade(Enum):
     XH = 0
     SH = 1
@@ -716,3 +735,47 @@ CountryCodes = {
     "BL": "Saint Barthélemy",
     "MF": "Saint Martin (French part)",
 }
+
+# Country acronyms, indexed by country code
+CountryAcronyms = tuple(CountryCodes.keys())
+
+# Default priority of outbound packets, everything else is sent as `Priority.Control`
+PacketPriorities = {
+    ClientPackets.CREATE_MATCH: Priority.Match,
+    ClientPackets.JOIN_MATCH: Priority.Match,
+    ClientPackets.MATCH_CHANGE_SLOT: Priority.Match,
+    ClientPackets.MATCH_READY: Priority.Match,
+    ClientPackets.MATCH_LOCK: Priority.Match,
+    ClientPackets.MATCH_CHANGE_SETTINGS: Priority.Match,
+    ClientPackets.MATCH_START: Priority.Match,
+    ClientPackets.MATCH_CHANGE_MODS: Priority.Match,
+    ClientPackets.MATCH_LOAD_COMPLETE: Priority.Match,
+    ClientPackets.MATCH_NO_BEATMAP: Priority.Match,
+    ClientPackets.MATCH_NOT_READY: Priority.Match,
+    ClientPackets.MATCH_HAS_BEATMAP: Priority.Match,
+    ClientPackets.MATCH_SKIP_REQUEST: Priority.Match,
+    ClientPackets.MATCH_TRANSFER_HOST: Priority.Match,
+    ClientPackets.MATCH_CHANGE_TEAM: Priority.Match,
+    ClientPackets.MATCH_INVITE: Priority.Match,
+    ClientPackets.MATCH_CHANGE_PASSWORD: Priority.Match,
+    ClientPackets.TOURNAMENT_MATCH_INFO_REQUEST: Priority.Match,
+    ClientPackets.TOURNAMENT_JOIN_MATCH_CHANNEL: Priority.Match,
+    ClientPackets.SEND_PUBLIC_MESSAGE: Priority.Chat,
+    ClientPackets.SEND_PRIVATE_MESSAGE: Priority.Chat,
+    ClientPackets.CHANNEL_JOIN: Priority.Chat,
+    ClientPackets.CHANNEL_PART: Priority.Chat,
+    ClientPackets.SPECTATE_FRAMES: Priority.Frames,
+    ClientPackets.MATCH_SCORE_UPDATE: Priority.Frames,
+    ClientPackets.USER_STATS_REQUEST: Priority.Bulk,
+    ClientPackets.USER_PRESENCE_REQUEST: Priority.Bulk,
+    ClientPackets.USER_PRESENCE_REQUEST_ALL: Priority.Bulk,
+    ClientPackets.BEATMAP_INFO_REQUEST: Priority.Bulk,
+    # Packets that end a session or state, which need to be
+    # sent after every packet that was queued before them
+    ClientPackets.LOGOUT: Priority.Final,
+    ClientPackets.STOP_SPECTATING: Priority.Final,
+    ClientPackets.PART_MATCH: Priority.Final,
+    ClientPackets.MATCH_COMPLETE: Priority.Final,
+    ClientPackets.MATCH_FAILED: Priority.Final,
+    ClientPackets.TOURNAMENT_LEAVE_MATCH_CHANNEL: Priority.Final,
+}
@@ -0,0 +1,124 @@
+from collections.abc import Collection, Iterable, Iterator
+
+import struct
+
+# Packet header: u16 id, bool compression, u32 payload size
+HEADER = struct.Struct("<HBI")
+USER_ID = struct.Struct("<i")
+
+
+def iter_packets(data: bytes | memoryview) -> Iterator[tuple[int, bool, memoryview]]:
+    """Split a buffer of bancho packets into `(id, compression, payload)` tuples.
+
+    The buffer is walked by offset, and every payload is a `memoryview`
+    into the original data, so no bytes are copied while framing.
+    """
+    view = memoryview(data)
+    size = len(view)
+    offset = 0
+
+    while offset < size:
+        if size - offset < HEADER.size:
+            raise OverflowError("Buffer overflow")
+
+        packet_id, compression, length = HEADER.unpack_from(view, offset)
+        start = offset + HEADER.size
+        offset = start + length
+
+        if offset > size:
+            raise OverflowError("Buffer overflow")
+
+        yield packet_id, bool(compression), view[start:offset]
+
+
+class PacketParser:
+    """Incremental packet parser for stream-based transports
+
+    Chunks of any size can be passed into `feed`, which yields every packet
+    that has been completed by that chunk. Incomplete data is kept in an
+    internal buffer, until the rest of the packet arrives.
+    """
+
+    def __init__(self) -> None:
+        self.buffer = bytearray()
+
+    @property
+    def pending(self) -> int:
+        """Amount of buffered bytes that don't form a complete packet yet"""
+        return len(self.buffer)
+
+    def required_size(self) -> int:
+        """Size the buffer needs to reach, to contain the next packet"""
+        if len(self.buffer) < HEADER.size:
+            return HEADER.size
+
+        return HEADER.size + HEADER.unpack_from(self.buffer)[2]
+
+    def feed(
+        self, data: bytes | bytearray | memoryview
+    ) -> Iterator[tuple[int, bool, memoryview]]:
+        """Add a chunk of data and yield every packet that is complete
+
+        The returned generator needs to be consumed, for the chunk to be parsed.
+        """
+        if self.buffer:
+            self.buffer += data
+
+            if len(self.buffer) < self.required_size():
+                return
+
+            data = bytes(self.buffer)
+            self.buffer.clear()
+
+        view = memoryview(data)
+        size = len(view)
+        offset = 0
+
+        while size - offset >= HEADER.size:
+            packet_id, compression, length = HEADER.unpack_from(view, offset)
+            start = offset + HEADER.size
+            end = start + length
+
+            if end > size:
+                break
+
+            yield packet_id, bool(compression), view[start:end]
+            offset = end
+
+        if offset < size:
+            self.buffer += view[offset:]
+
+    def reset(self) -> None:
+        self.buffer.clear()
+
+
+def coalesce_packets(
+    packets: Iterable[tuple[int, bool, memoryview]], packet_ids: Collection[int]
+) -> list[tuple[int, bool, memoryview]]:
+    """Keep only the last packet per user id, for every packet in `packet_ids`
+
+    The user id is expected to be the first s32 of the payload.
+    Every other packet is left untouched and the order is preserved.
+    """
+    packets = list(packets)
+    keys: list[tuple[int, int] | None] = []
+    last: dict[tuple[int, int], int] = {}
+
+    for index, (packet_id, compression, payload) in enumerate(packets):
+        if packet_id not in packet_ids or compression or len(payload) < 4:
+            keys.append(None)
+            continue
+
+        key = (packet_id, USER_ID.unpack_from(payload)[0])
+        keys.append(key)
+        last[key] = index
+
+    if len(last) == len(keys) - keys.count(None):
+        # Nothing to coalesce
+        return packets
+
+    return [
+        packet
+        for index, (packet, key) in enumerate(zip(packets, keys))
+        if key is None or last[key] == index
+    ]
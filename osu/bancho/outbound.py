@@ -0,0 +1,259 @@
+from collections.abc import Callable
+from collections import deque
+from itertools import count
+from threading import Lock
+
+from .constants import ClientPackets, Priority
+from .framing import HEADER, iter_packets
+from .streams import StreamIn, StreamOut
+
+import math
+import time
+
+# A stage receives the queued packets before they are flushed,
+# and returns the packets that should actually be sent
+OutboundStage = Callable[[list[bytes]], list[bytes]]
+
+# Packets that overwrite a state on the server, where only the last one matters
+LastWinsPackets = {
+    ClientPackets.CHANGE_ACTION,
+    ClientPackets.RECEIVE_UPDATES,
+    ClientPackets.SET_AWAY_MESSAGE,
+    ClientPackets.TOGGLE_BLOCK_NON_FRIEND_DMS,
+}
+
+# Packets that have no additional effect when they are sent twice
+IdempotentPackets = {
+    ClientPackets.PING,
+    ClientPackets.REQUEST_STATUS_UPDATE,
+    ClientPackets.USER_PRESENCE_REQUEST_ALL,
+    ClientPackets.CHANNEL_JOIN,
+    ClientPackets.CHANNEL_PART,
+}
+
+# Packets that undo each other, e.g. a join after a part is not a duplicate
+OpposingPackets: dict[int, int] = {
+    ClientPackets.CHANNEL_JOIN: ClientPackets.CHANNEL_PART,
+    ClientPackets.CHANNEL_PART: ClientPackets.CHANNEL_JOIN,
+}
+
+# Packets with an id list as payload, which can be merged into one request
+MergeablePackets = {
+    ClientPackets.USER_PRESENCE_REQUEST,
+    ClientPackets.USER_STATS_REQUEST,
+}
+
+CollapsiblePackets = LastWinsPackets | IdempotentPackets | MergeablePackets
+
+
+def encode_packet(packet_id: int, payload: bytes | memoryview) -> bytes:
+    stream = StreamOut(capacity=HEADER.size + len(payload))
+    stream.pack(HEADER, packet_id, False, len(payload))
+    stream.write(payload)
+    return stream.get()
+
+
+def collapse_packets(packets: list[bytes], chunk_size: int = 255) -> list[bytes]:
+    """Remove redundant packets from an outbound batch
+
+    - Only the last packet of every `LastWinsPackets` id is kept
+    - Duplicates of `IdempotentPackets` are dropped
+    - The id lists of `MergeablePackets` are merged, deduplicated and
+      split into chunks of `chunk_size`, at the position of the first request
+    """
+    split = [packet for data in packets for packet in iter_packets(data)]
+    ids = {packet_id for packet_id, _, _ in split}
+
+    if ids.isdisjoint(CollapsiblePackets):
+        # Nothing to collapse
+        return packets
+
+    last: dict[int, int] = {}
+    merged: dict[int, dict[int, None]] = {}
+
+    for index, (packet_id, _, payload) in enumerate(split):
+        if packet_id in LastWinsPackets:
+            last[packet_id] = index
+
+        elif packet_id in MergeablePackets:
+            merged.setdefault(packet_id, {}).update(
+                dict.fromkeys(StreamIn(payload).intlist())
+            )
+
+    seen: set[tuple[int, bytes]] = set()
+    result: list[bytes] = []
+
+    for index, (packet_id, _, payload) in enumerate(split):
+        if packet_id in LastWinsPackets and last[packet_id] != index:
+            continue
+
+        if packet_id in IdempotentPackets:
+            key = (packet_id, bytes(payload))
+
+            if key in seen:
+                continue
+
+            seen.add(key)
+
+            if opposing := OpposingPackets.get(packet_id):
+                seen.discard((opposing, key[1]))
+
+        if packet_id in MergeablePackets:
+            if (request := merged.pop(packet_id, None)) is None:
+                # Already merged into the first request
+                continue
+
+            id_list = list(request)
+
+            for i in range(0, len(id_list), chunk_size):
+                stream = StreamOut()
+                stream.intlist(id_list[i : i + chunk_size])
+                result.append(encode_packet(packet_id, stream.get()))
+
+            continue
+
+        result.append(encode_packet(packet_id, payload))
+
+    return result
+
+
+class TokenBucket:
+    """Rate limit of `rate` packets per second, with bursts of up to `burst` packets"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float | None = None) -> None:
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        """Consume a token, if one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens < 1:
+            return False
+
+        self.tokens -= 1
+        return True
+
+    def delay(self) -> float:
+        """Time until the next token is available"""
+        elapsed = time.monotonic() - self.updated
+        missing = 1 - min(self.burst, self.tokens + elapsed * self.rate)
+
+        if missing <= 0:
+            return 0.0
+
+        return missing / self.rate if self.rate > 0 else math.inf
+
+
+class OutboundQueue:
+    """OutboundQueue
+    ----------------
+    Thread-safe send queue, with one FIFO per `Priority` class.
+
+    Batches are drained in order of priority, so control & match packets never
+    wait behind frames or bulk requests. Every class can be rate limited with
+    `limit`, and packets that exceed the limit stay queued for the next batch.
+    The order of packets inside of a class is always kept.
+
+    Packets of the `Final` class end a session or state, e.g. a logout, and act
+    as a barrier: every packet that was queued before one of them is sent ahead
+    of it, regardless of the rate limits. Packets that were queued after it
+    stay in the queue until the next batch.
+
+    Attributes:
+        `queues`: dict[Priority, deque[tuple[int, bytes]]] (Packets with their sequence number)
+
+        `buckets`: dict[Priority, TokenBucket] (Rate limits, unlimited by default)
+    """
+
+    def __init__(self) -> None:
+        self.queues: dict[Priority, deque[tuple[int, bytes]]] = {
+            priority: deque() for priority in Priority
+        }
+        self.buckets: dict[Priority, TokenBucket] = {}
+        self.sequence = count()
+        self.lock = Lock()
+
+    def __len__(self) -> int:
+        return self.qsize()
+
+    def qsize(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def empty(self) -> bool:
+        return not any(self.queues.values())
+
+    def delay(self) -> float:
+        """Time until `drain` would return a packet, or infinity if nothing is queued"""
+        delay = math.inf
+
+        with self.lock:
+            if self.queues[Priority.Final]:
+                return 0.0
+
+            for priority, queue in self.queues.items():
+                if not queue:
+                    continue
+
+                if (bucket := self.buckets.get(priority)) is None:
+                    return 0.0
+
+                delay = min(delay, bucket.delay())
+
+        return delay
+
+    def put(self, data: bytes, priority: Priority = Priority.Control) -> None:
+        with self.lock:
+            self.queues[priority].append((next(self.sequence), data))
+
+    def limit(
+        self, priority: Priority, rate: float | None, burst: float | None = None
+    ) -> None:
+        """Limit a class to `rate` packets per second, or remove its limit with `None`"""
+        with self.lock:
+            if rate is None:
+                self.buckets.pop(priority, None)
+                return
+
+            self.buckets[priority] = TokenBucket(rate, burst)
+
+    def drain(self) -> list[bytes]:
+        """Get every queued packet, that is allowed by the rate limits"""
+        packets: list[bytes] = []
+
+        with self.lock:
+            final = self.queues[Priority.Final]
+            barrier = final[0][0] if final else None
+
+            for priority, queue in self.queues.items():
+                if priority == Priority.Final:
+                    continue
+
+                bucket = self.buckets.get(priority)
+
+                while queue:
+                    if barrier is not None:
+                        if queue[0][0] > barrier:
+                            # Queued after the barrier
+                            break
+
+                    elif bucket is not None and not bucket.take():
+                        break
+
+                    packets.append(queue.popleft()[1])
+
+            if barrier is not None:
+                packets.append(final.popleft()[1])
+
+        return packets
+
+    def clear(self) -> None:
+        with self.lock:
+            for queue in self.queues.values():
+                queue.clear()
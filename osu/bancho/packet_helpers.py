@@ -20,7 +20,7 @@ def resolve_match(stream: StreamIn, game: "Game") -> Match:
         if game.bancho.players.by_id(slot.player_id):
             continue
 
-        game.bancho.players.add(Player(slot.player_id, name="", game=game))
+        game.bancho.players.add(game.bancho.players.create(slot.player_id))
         missing_players.append(slot.player_id)
 
     if missing_players:
@@ -44,7 +44,7 @@ def resolve_message(stream: StreamIn, game: "Game"):
         player = game.bancho.players.by_name(sender_name)
 
     if not player:
-        player = Player(sender_id, sender_name, game)
+        player = game.bancho.players.create(sender_id, sender_name)
 
         if sender_id:
             game.bancho.players.add(player)
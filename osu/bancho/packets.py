@@ -1,4 +1,4 @@
-from collections.abc import Callable
+from collections.abc import Callable, Iterable
 from typing import TYPE_CHECKING
 from copy import copy
 
@@ -6,13 +6,14 @@ from ..objects.replays import ScoreFrame, ReplayFrame
 from ..objects.beatmap import BeatmapInfo
 from ..objects.channel import Channel
 from ..objects.match import Match
-from ..objects.player import Player
+from ..utils import cached_enum
 
 if TYPE_CHECKING:
     from ..game import Game
 
 from .packet_helpers import resolve_match, resolve_message
-from .streams import StreamIn
+from .framing import coalesce_packets, iter_packets
+from .streams import StreamIn, StringPool
 from .constants import (
     ServerPackets,
     ClientPackets,
@@ -25,50 +26,140 @@ from .constants import (
 )
 
 import threading
+import logging
 import zlib
 import time
 
 
 class PacketHandler:
+    """PacketHandler
+    ----------------
+    Splits incoming data into packets and dispatches them to their handlers.
+
+    Attributes:
+        `selective`: bool (Skip passive handlers, if no event was registered for their packet)
+
+        `coalesce`: bool (Only handle the last USER_STATS & USER_PRESENCE of every player in a batch)
+
+        `suppress_unchanged`: bool (Don't call events for USER_STATS & USER_PRESENCE payloads that did not change)
+
+        `strings`: osu.bancho.streams.StringPool | None (Share repeated strings between decoded packets)
+    """
+
     def __init__(self) -> None:
         self.handlers: dict[ServerPackets, list[Callable]] = {}
+        self.passive: set[Callable] = set()
+        self.table: list[tuple[Callable, ...]] = []
+        self.active: list[tuple[Callable, ...]] = []
+        self.selective = True
+        self.coalesce = False
+        self.suppress_unchanged = False
+        self.strings: StringPool | None = None
+
+    def register(self, packet: ServerPackets, passive: bool = False):
+        """Register a packet handler
+
+        Passive handlers only decode the packet to pass it into an event.
+        When `selective` is enabled, they will be skipped entirely, if
+        no event was registered for their packet.
+        """
 
-    def register(self, packet: ServerPackets):
         def wrapper(f: Callable):
             if packet in self.handlers:
                 self.handlers[packet].append(f)
             else:
                 self.handlers[packet] = [f]
+            if passive:
+                self.passive.add(f)
+            self.compile()
             return f
 
         return wrapper
 
-    def data_received(self, data: bytes, game: "Game"):
-        stream = StreamIn(data)
+    def compile(self) -> None:
+        """Rebuild the dispatch tables, which hold the handlers of every packet id"""
+        size = max(self.handlers, default=-1) + 1
+        table: list[tuple[Callable, ...]] = [()] * size
+        active: list[tuple[Callable, ...]] = [()] * size
+
+        for packet, handlers in self.handlers.items():
+            table[packet] = tuple(handlers)
+            active[packet] = tuple(f for f in handlers if f not in self.passive)
+
+        # Update the tables in place, so that copies of this handler stay in sync
+        self.table[:] = table
+        self.active[:] = active
+
+    def data_received(self, data: bytes | memoryview, game: "Game") -> int:
+        return self.process_packets(iter_packets(data), game)
+
+    def process_packets(
+        self, packets: Iterable[tuple[int, bool, memoryview]], game: "Game"
+    ) -> int:
+        """Handle a sequence of packets, and return the amount of received packets"""
+        table = self.table
+        count = 0
+        debug = game.logger.isEnabledFor(logging.DEBUG)
 
-        while not stream.eof():
-            packet = ServerPackets(stream.u16())
-            compression = stream.bool()  # unused
-            data = stream.read(stream.u32())
+        if self.coalesce:
+            # Only handle the latest stats & presence of every player
+            packets = coalesce_packets(packets, CoalescedPackets)
+
+        for packet_id, compression, payload in packets:
+            count += 1
 
             if compression:
                 # Compression was used in very early versions of bancho
-                data = zlib.decompress(data)
+                try:
+                    payload = memoryview(zlib.decompress(payload, zlib.MAX_WBITS | 32))
+                except zlib.error as exc:
+                    # Skip the packet, so that the rest of the data is still parsed
+                    game.logger.warning(
+                        f'Failed to decompress "{packet_name(packet_id)}": {exc}'
+                    )
+                    continue
+
+            if debug:
+                game.logger.debug(
+                    f'Received packet {packet_name(packet_id)} -> "%s"', bytes(payload)
+                )
 
-            game.logger.debug(f'Received packet {packet.name} -> "%s"', data)
+            if packet_id >= len(table) or not table[packet_id]:
+                game.logger.warning(f'No handler found for "{packet_name(packet_id)}"')
+                continue
+
+            if not (handlers := self.select(packet_id, game)):
+                # Nobody is interested in this packet
+                continue
 
             # Handling packet
-            self.packet_received(packet, StreamIn(data), game)
+            self.dispatch(handlers, StreamIn(payload, pool=self.strings), game)
 
-            # Reset stream
-            stream = StreamIn(stream.readall())
+        return count
 
     def packet_received(self, packet: ServerPackets, data: StreamIn, game: "Game"):
-        if packet not in self.handlers:
+        if packet >= len(self.table) or not self.table[packet]:
             game.logger.warning(f'No handler found for "{packet.name}"')
             return
 
-        for handler in self.handlers[packet]:
+        self.dispatch(self.select(packet, game), data, game)
+
+    def select(self, packet_id: int, game: "Game") -> tuple[Callable, ...]:
+        """Get the handlers that need to run for a packet"""
+        if not self.selective:
+            return self.table[packet_id]
+
+        events = game.events.table
+
+        if packet_id < len(events) and events[packet_id]:
+            return self.table[packet_id]
+
+        return self.active[packet_id]
+
+    def dispatch(
+        self, handlers: tuple[Callable, ...], data: StreamIn, game: "Game"
+    ) -> None:
+        for handler in handlers:
             try:
                 handler(data, game)
             except Exception as exc:
@@ -77,6 +168,15 @@ class PacketHandler:
                 )
 
 
+def packet_name(packet_id: int) -> str:
+    if packet_id in PacketNames:
+        return PacketNames[packet_id]
+    return f"Unknown ({packet_id})"
+
+
+PacketNames = {packet.value: packet.name for packet in ServerPackets}
+CoalescedPackets = {ServerPackets.USER_STATS, ServerPackets.USER_PRESENCE}
+
 Packets = PacketHandler()
 
 
@@ -131,14 +231,14 @@ def login_reply(stream: StreamIn, game: "Game"):
     game.logger.info(f"Logged in with id: {response}")
     game.bancho.user_id = response
 
-    game.bancho.player = Player(response, game.username, game)
+    game.bancho.player = game.bancho.players.create(response, game.username)
     game.bancho.players.add(game.bancho.player)
 
     game.bancho.fast_read = True
     game.events.call(ServerPackets.USER_ID, response)
 
 
-@Packets.register(ServerPackets.PONG)
+@Packets.register(ServerPackets.PONG, passive=True)
 def pong(stream: StreamIn, game: "Game"):
     game.events.call(ServerPackets.PONG)
 
@@ -163,7 +263,7 @@ def friends(stream: StreamIn, game: "Game"):
     game.events.call(ServerPackets.FRIENDS_LIST, game.bancho.friends)
 
 
-@Packets.register(ServerPackets.MAIN_MENU_ICON)
+@Packets.register(ServerPackets.MAIN_MENU_ICON, passive=True)
 def menu_icon(stream: StreamIn, game: "Game"):
     image, link = stream.string().split("|")
     game.events.call(ServerPackets.MAIN_MENU_ICON, image, link)
@@ -181,7 +281,7 @@ def version_update_forced(stream: StreamIn, game: "Game"):
     game.events.call(ServerPackets.VERSION_UPDATE_FORCED)
 
 
-@Packets.register(ServerPackets.GET_ATTENTION)
+@Packets.register(ServerPackets.GET_ATTENTION, passive=True)
 def attension(stream: StreamIn, game: "Game"):
     game.events.call(ServerPackets.GET_ATTENTION)
 
@@ -199,7 +299,21 @@ def presence(stream: StreamIn, game: "Game"):
 
     if not (player := game.bancho.players.by_id(user_id)):
         # Add new player, if not found in collection
-        game.bancho.players.add(player := Player(user_id, name="", game=game))
+        game.bancho.players.add(player := game.bancho.players.create(user_id))
+
+    game.bancho.presence_requests.satisfy(user_id)
+
+    if stream.getbuffer() == player.presence_fingerprint:
+        # Presence did not change since the last update
+        game.bancho.fast_read = True
+
+        if not game.packets.suppress_unchanged:
+            game.events.call(ServerPackets.USER_PRESENCE, player)
+
+        return
+
+    player.presence_fingerprint = stream.get()
+    shared_fields = (player.mode, player.rank)
 
     player.name = stream.string()
     player.timezone = stream.u8() - 24
@@ -207,13 +321,18 @@ def presence(stream: StreamIn, game: "Game"):
 
     b = stream.u8()  # Contains privileges and play mode
 
-    player.privileges = Privileges(b & -255)
-    player.status.mode = Mode(max(0, min(3, (b & 224) >> 5)))
+    player.privileges = cached_enum(Privileges, b & -255)
+    player.status.mode = cached_enum(Mode, max(0, min(3, (b & 224) >> 5)))
 
     player.longitude = stream.float()
     player.latitude = stream.float()
     player.rank = stream.s32()
 
+    if (player.mode, player.rank) != shared_fields:
+        # Mode & rank are also part of the stats payload
+        player.stats_fingerprint = b""
+
+    game.bancho.players.reindex(player)
     game.bancho.fast_read = True
     game.events.call(ServerPackets.USER_PRESENCE, player)
 
@@ -225,16 +344,29 @@ def stats(stream: StreamIn, game: "Game"):
     if not (player := game.bancho.players.by_id(user_id)):
         # Add new player, if not found in collection
         game.bancho.request_presence([user_id])
-        game.bancho.players.add(player := Player(user_id, name="", game=game))
+        game.bancho.players.add(player := game.bancho.players.create(user_id))
+
+    game.bancho.stats_requests.satisfy(user_id)
+
+    if stream.getbuffer() == player.stats_fingerprint:
+        # Stats did not change since the last update
+        game.bancho.fast_read = True
 
+        if not game.packets.suppress_unchanged:
+            game.events.call(ServerPackets.USER_STATS, player)
+
+        return
+
+    player.stats_fingerprint = stream.get()
+    shared_fields = (player.mode, player.rank)
     player.last_status = copy(player.status)
 
     # Status
-    player.status.action = StatusAction(stream.u8())
+    player.status.action = cached_enum(StatusAction, stream.u8())
     player.status.text = stream.string()
     player.status.checksum = stream.string()
-    player.status.mods = Mods(stream.u32())
-    player.status.mode = Mode(max(0, min(3, stream.u8())))
+    player.status.mods = cached_enum(Mods, stream.u32())
+    player.status.mode = cached_enum(Mode, max(0, min(3, stream.u8())))
     player.status.beatmap_id = stream.s32()
 
     # Stats
@@ -245,6 +377,11 @@ def stats(stream: StreamIn, game: "Game"):
     player.rank = stream.s32()
     player.pp = stream.s16()
 
+    if (player.mode, player.rank) != shared_fields:
+        # Mode & rank are also part of the presence payload
+        player.presence_fingerprint = b""
+
+    game.bancho.players.reindex(player)
     game.bancho.fast_read = True
     game.events.call(ServerPackets.USER_STATS, player)
 
@@ -254,7 +391,7 @@ def presence_bundle(stream: StreamIn, game: "Game"):
     user_ids = stream.intlist()
 
     for id in user_ids:
-        game.bancho.players.add(Player(id, name="", game=game))
+        game.bancho.players.add(game.bancho.players.create(id))
 
     game.bancho.fast_read = True
     game.events.call(ServerPackets.USER_PRESENCE_BUNDLE, user_ids)
@@ -266,7 +403,7 @@ def presence_single(stream: StreamIn, game: "Game"):
 
     if not (game.bancho.players.by_id(user_id)):
         # Add player if not found
-        game.bancho.players.add(Player(user_id, name="", game=game))
+        game.bancho.players.add(game.bancho.players.create(user_id))
 
     game.events.call(ServerPackets.USER_PRESENCE_SINGLE, user_id)
 
@@ -291,7 +428,6 @@ def irc_change_username(stream: StreamIn, game: "Game"):
 
     if player:
         player.name = new_name
-        player.logger.name = new_name
 
     game.events.call(ServerPackets.HANDLE_IRC_CHANGE_USERNAME, old_name, new_name)
 
@@ -371,14 +507,14 @@ def fellow_spectator_left(stream: StreamIn, game: "Game"):
     game.events.call(ServerPackets.SPECTATOR_LEFT, player)
 
 
-@Packets.register(ServerPackets.SPECTATE_FRAMES)
+@Packets.register(ServerPackets.SPECTATE_FRAMES, passive=True)
 def frames(stream: StreamIn, game: "Game"):
     if not game.bancho.spectating:
         return
 
     extra = stream.s32()
     frames = [ReplayFrame.decode(stream) for _ in range(stream.u16())]
-    action = ReplayAction(stream.u8())
+    action = cached_enum(ReplayAction, stream.u8())
 
     try:
         score_frame = ScoreFrame.decode(stream)
@@ -438,7 +574,7 @@ def channel_autojoin(stream: StreamIn, game: "Game"):
     game.events.call(ServerPackets.CHANNEL_AUTO_JOIN, c)
 
 
-@Packets.register(ServerPackets.CHANNEL_INFO_END)
+@Packets.register(ServerPackets.CHANNEL_INFO_END, passive=True)
 def channel_info_end(stream: StreamIn, game: "Game"):
     game.events.call(ServerPackets.CHANNEL_INFO_END)
 
@@ -467,7 +603,7 @@ def channel_revoked(stream: StreamIn, game: "Game"):
     game.events.call(ServerPackets.CHANNEL_KICK, c)
 
 
-@Packets.register(ServerPackets.BEATMAP_INFO_REPLY)
+@Packets.register(ServerPackets.BEATMAP_INFO_REPLY, passive=True)
 def beatmapinfo_reply(stream: StreamIn, game: "Game"):
     beatmaps = [BeatmapInfo.decode(stream) for beatmap in range(stream.s32())]
     game.events.call(ServerPackets.BEATMAP_INFO_REPLY, beatmaps)
@@ -509,7 +645,7 @@ def match_join_success(stream: StreamIn, game: "Game"):
     game.events.call(ServerPackets.MATCH_JOIN_SUCCESS, match)
 
 
-@Packets.register(ServerPackets.MATCH_JOIN_FAIL)
+@Packets.register(ServerPackets.MATCH_JOIN_FAIL, passive=True)
 def match_join_fail(stream: StreamIn, game: "Game"):
     game.events.call(ServerPackets.MATCH_JOIN_FAIL)
 
@@ -521,7 +657,7 @@ def match_start(stream: StreamIn, game: "Game"):
     game.events.call(ServerPackets.MATCH_START, match)
 
 
-@Packets.register(ServerPackets.MATCH_SCORE_UPDATE)
+@Packets.register(ServerPackets.MATCH_SCORE_UPDATE, passive=True)
 def match_score_update(stream: StreamIn, game: "Game"):
     score_frame = ScoreFrame.decode(stream)
     game.events.call(ServerPackets.MATCH_SCORE_UPDATE, score_frame)
@@ -535,12 +671,12 @@ def match_transfer_host(stream: StreamIn, game: "Game"):
     game.events.call(ServerPackets.MATCH_TRANSFER_HOST, game.bancho.match)
 
 
-@Packets.register(ServerPackets.MATCH_ALL_PLAYERS_LOADED)
+@Packets.register(ServerPackets.MATCH_ALL_PLAYERS_LOADED, passive=True)
 def match_all_players_loaded(stream: StreamIn, game: "Game"):
     game.events.call(ServerPackets.MATCH_ALL_PLAYERS_LOADED)
 
 
-@Packets.register(ServerPackets.MATCH_PLAYER_FAILED)
+@Packets.register(ServerPackets.MATCH_PLAYER_FAILED, passive=True)
 def match_player_failed(stream: StreamIn, game: "Game"):
     slot_id = stream.s32()
     game.events.call(ServerPackets.MATCH_PLAYER_FAILED, slot_id)
@@ -554,12 +690,12 @@ def match_complete(stream: StreamIn, game: "Game"):
     game.events.call(ServerPackets.MATCH_COMPLETE, game.bancho.match)
 
 
-@Packets.register(ServerPackets.MATCH_SKIP)
+@Packets.register(ServerPackets.MATCH_SKIP, passive=True)
 def match_skip(stream: StreamIn, game: "Game"):
     game.events.call(ServerPackets.MATCH_SKIP)
 
 
-@Packets.register(ServerPackets.MATCH_PLAYER_SKIPPED)
+@Packets.register(ServerPackets.MATCH_PLAYER_SKIPPED, passive=True)
 def match_player_skipped(stream: StreamIn, game: "Game"):
     slot_id = stream.s32()
     game.events.call(ServerPackets.MATCH_PLAYER_SKIPPED, slot_id)
@@ -661,25 +797,25 @@ def dms_blocked(stream: StreamIn, game: "Game"):
     game.events.call(ServerPackets.USER_DM_BLOCKED, player)
 
 
-@Packets.register(ServerPackets.MONITOR)
+@Packets.register(ServerPackets.MONITOR, passive=True)
 def monitor(stream: StreamIn, game: "Game"):
     game.events.call(ServerPackets.MONITOR)
 
 
-@Packets.register(ServerPackets.SWITCH_SERVER)
+@Packets.register(ServerPackets.SWITCH_SERVER, passive=True)
 def switch_server(stream: StreamIn, game: "Game"):
     # TODO: Implement backup bancho logic
     required_idle_time = stream.s32()
     game.events.call(ServerPackets.SWITCH_SERVER, required_idle_time)
 
 
-@Packets.register(ServerPackets.RTX)
+@Packets.register(ServerPackets.RTX, passive=True)
 def rtx(stream: StreamIn, game: "Game"):
     message = stream.string()
     game.events.call(ServerPackets.RTX, message)
 
 
-@Packets.register(ServerPackets.SWITCH_TOURNAMENT_SERVER)
+@Packets.register(ServerPackets.SWITCH_TOURNAMENT_SERVER, passive=True)
 def switch_tournament_server(stream: StreamIn, game: "Game"):
     # TODO: Connect to tourney server
     domain = stream.string()
@@ -0,0 +1,109 @@
+from collections.abc import Sequence
+from typing import Any
+
+from .streams import StreamIn, StreamOut
+
+import struct
+
+# Struct format characters of every fixed-width field type
+FixedFields = {
+    "u8": "B",
+    "s8": "b",
+    "u16": "H",
+    "s16": "h",
+    "u32": "I",
+    "s32": "i",
+    "u64": "Q",
+    "s64": "q",
+    "float": "f",
+    "double": "d",
+    "bool": "?",
+}
+
+
+class Schema:
+    """Schema
+    ---------
+    A packet layout that is declared once and compiled into struct unpackers.
+
+    Fields are declared as `(name, type)` pairs, where the type is the name of a
+    `StreamIn`/`StreamOut` method. Consecutive fixed-width fields are merged into
+    a single `struct.Struct`, which decodes and encodes the whole run in one call.
+    Variable-length fields, like `string` or `intlist`, are handled by the stream
+    method of the same name in between those runs.
+
+    Example:
+    >>> Header = Schema(("id", "s32"), ("mods", "u32"), ("name", "string"))
+    >>> id, mods, name = Header.decode(stream)
+    >>> Header.encode(stream, (id, mods, name))
+    """
+
+    def __init__(self, *fields: tuple[str, str], endian: str = "<") -> None:
+        self.fields = fields
+        self.endian = endian
+        self.steps: list[tuple[struct.Struct | str, int]] = []
+        self.compile()
+
+    def __repr__(self) -> str:
+        return f"<Schema ({', '.join(self.names)})>"
+
+    @property
+    def names(self) -> list[str]:
+        return [name for name, _ in self.fields]
+
+    @property
+    def size(self) -> int:
+        """Size of all fixed-width fields in bytes"""
+        return sum(step.size for step, _ in self.steps if not isinstance(step, str))
+
+    def compile(self) -> None:
+        """Merge consecutive fixed-width fields into struct formats"""
+        self.steps = []
+        run = ""
+
+        for name, field_type in self.fields:
+            if field_type in FixedFields:
+                run += FixedFields[field_type]
+                continue
+
+            if not hasattr(StreamIn, field_type) or not hasattr(StreamOut, field_type):
+                raise ValueError(f'Unknown field type "{field_type}" for "{name}"')
+
+            if run:
+                self.steps.append((struct.Struct(self.endian + run), len(run)))
+                run = ""
+
+            self.steps.append((field_type, 1))
+
+        if run:
+            self.steps.append((struct.Struct(self.endian + run), len(run)))
+
+    def decode(self, stream: StreamIn) -> tuple[Any, ...]:
+        """Read every field of this schema from the stream"""
+        if len(self.steps) == 1 and isinstance(self.steps[0][0], struct.Struct):
+            return stream.unpack(self.steps[0][0])
+
+        values: list[Any] = []
+
+        for step, _ in self.steps:
+            if isinstance(step, str):
+                values.append(getattr(stream, step)())
+            else:
+                values.extend(stream.unpack(step))
+
+        return tuple(values)
+
+    def encode(self, stream: StreamOut, values: Sequence[Any]) -> None:
+        """Write every field of this schema to the stream"""
+        if len(values) != len(self.fields):
+            raise ValueError(f"Expected {len(self.fields)} values, got {len(values)}")
+
+        index = 0
+
+        for step, count in self.steps:
+            if isinstance(step, str):
+                getattr(stream, step)(values[index])
+            else:
+                stream.pack(step, *values[index : index + count])
+
+            index += count
@@ -1,12 +1,112 @@
 import struct
 
 
+class Formats:
+    """Precompiled struct formats for every primitive of one endianness"""
+
+    __slots__ = (
+        "u8",
+        "s8",
+        "u16",
+        "s16",
+        "u32",
+        "s32",
+        "u64",
+        "s64",
+        "float",
+        "double",
+        "endian",
+        "intlists",
+    )
+
+    def __init__(self, endian: str) -> None:
+        self.u8 = struct.Struct("B")
+        self.s8 = struct.Struct("b")
+        self.u16 = struct.Struct(endian + "H")
+        self.s16 = struct.Struct(endian + "h")
+        self.u32 = struct.Struct(endian + "I")
+        self.s32 = struct.Struct(endian + "i")
+        self.u64 = struct.Struct(endian + "Q")
+        self.s64 = struct.Struct(endian + "q")
+        self.float = struct.Struct(endian + "f")
+        self.double = struct.Struct(endian + "d")
+        self.endian = endian
+        self.intlists: dict[int, struct.Struct] = {}
+
+    def intlist(self, count: int) -> struct.Struct:
+        """Struct for a run of `count` s32 values"""
+        if count not in self.intlists:
+            if len(self.intlists) >= 256:
+                self.intlists.clear()
+
+            self.intlists[count] = struct.Struct(f"{self.endian}{count}i")
+
+        return self.intlists[count]
+
+
+formats: dict[str, Formats] = {}
+
+
+def get_formats(endian: str) -> Formats:
+    if endian not in formats:
+        formats[endian] = Formats(endian)
+    return formats[endian]
+
+
+class StringPool:
+    """Bounded pool of decoded strings, keyed on their raw bytes
+
+    Repeated strings, like usernames or beatmap checksums, will share a
+    single `str` object and skip the utf-8 decoding. Strings longer than
+    `max_length` bytes are not pooled, and the oldest entry is evicted
+    once the pool reaches its capacity.
+    """
+
+    __slots__ = ("strings", "capacity", "max_length")
+
+    def __init__(self, capacity: int = 4096, max_length: int = 64) -> None:
+        self.strings: dict[bytes, str] = {}
+        self.capacity = capacity
+        self.max_length = max_length
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def get(self, data: bytes | memoryview) -> str:
+        key = bytes(data)
+
+        if (string := self.strings.get(key)) is not None:
+            return string
+
+        string = str(key, "utf-8")
+
+        if len(self.strings) >= self.capacity:
+            # Evict the oldest entry
+            del self.strings[next(iter(self.strings))]
+
+        self.strings[key] = string
+        return string
+
+    def clear(self) -> None:
+        self.strings.clear()
+
+
 class StreamOut:
-    def __init__(self, endian="<"):
+    def __init__(self, endian="<", capacity: int = 0):
         self.endian = endian
-        self.data = bytearray()
+        self.data = bytearray(capacity)
+        self.length = 0
         self.pos = 0
-        self.stack = []
+        self.stack: list[int] = []
+
+    @property
+    def endian(self) -> str:
+        return self._endian
+
+    @endian.setter
+    def endian(self, value: str) -> None:
+        self._endian = value
+        self.formats = get_formats(value)
 
     def push(self):
         self.stack.append(self.pos)
@@ -15,17 +115,35 @@ class StreamOut:
         self.pos = self.stack.pop()
 
     def get(self):
-        return bytes(self.data)
+        return bytes(self.getbuffer())
+
+    def getbuffer(self) -> memoryview:
+        """Return a view of the written data without copying it
+
+        The buffer can't grow while a view is alive, so release
+        the view before writing more data to the stream.
+        """
+        return memoryview(self.data)[: self.length]
 
     def size(self):
-        return len(self.data)
+        return self.length
 
     def tell(self):
         return self.pos
 
+    def reserve(self, size: int) -> None:
+        """Make sure the buffer can hold at least `size` bytes"""
+        capacity = len(self.data)
+
+        if size <= capacity:
+            return
+
+        self.data.extend(bytes(max(size, capacity * 2, 64) - capacity))
+
     def seek(self, pos):
-        if pos > len(self.data):
-            self.data += bytes(pos - len(self.data))
+        if pos > self.length:
+            self.reserve(pos)
+            self.length = pos
         self.pos = pos
 
     def skip(self, num):
@@ -35,14 +153,31 @@ class StreamOut:
         self.skip((num - self.pos % num) % num)
 
     def available(self):
-        return len(self.data) - self.pos
+        return self.length - self.pos
 
     def eof(self):
-        return self.pos >= len(self.data)
+        return self.pos >= self.length
 
     def write(self, data):
-        self.data[self.pos : self.pos + len(data)] = data
-        self.pos += len(data)
+        pos = self.pos
+        end = pos + len(data)
+        if end > len(self.data):
+            self.reserve(end)
+        self.data[pos:end] = data
+        self.pos = end
+        if end > self.length:
+            self.length = end
+
+    def pack(self, format: struct.Struct, *values):
+        """Write values with a precompiled struct"""
+        pos = self.pos
+        end = pos + format.size
+        if end > len(self.data):
+            self.reserve(end)
+        format.pack_into(self.data, pos, *values)
+        self.pos = end
+        if end > self.length:
+            self.length = end
 
     def pad(self, num, char=b"\0"):
         self.write(char * num)
@@ -51,28 +186,28 @@ class StreamOut:
         self.write(data.encode("ascii"))
 
     def u8(self, value):
-        self.write(bytes([value]))
+        self.pack(self.formats.u8, value)
 
     def u16(self, value):
-        self.write(struct.pack(self.endian + "H", value))
+        self.pack(self.formats.u16, value)
 
     def u32(self, value):
-        self.write(struct.pack(self.endian + "I", value))
+        self.pack(self.formats.u32, value)
 
     def u64(self, value):
-        self.write(struct.pack(self.endian + "Q", value))
+        self.pack(self.formats.u64, value)
 
     def s8(self, value):
-        self.write(struct.pack("b", value))
+        self.pack(self.formats.s8, value)
 
     def s16(self, value):
-        self.write(struct.pack(self.endian + "h", value))
+        self.pack(self.formats.s16, value)
 
     def s32(self, value):
-        self.write(struct.pack(self.endian + "i", value))
+        self.pack(self.formats.s32, value)
 
     def s64(self, value):
-        self.write(struct.pack(self.endian + "q", value))
+        self.pack(self.formats.s64, value)
 
     def u24(self, value):
         if self.endian == ">":
@@ -83,10 +218,10 @@ class StreamOut:
             self.u16(value >> 8)
 
     def float(self, value):
-        self.write(struct.pack(self.endian + "f", value))
+        self.pack(self.formats.float, value)
 
     def double(self, value):
-        self.write(struct.pack(self.endian + "d", value))
+        self.pack(self.formats.double, value)
 
     def bool(self, value):
         self.u8(1 if value else 0)
@@ -99,7 +234,7 @@ class StreamOut:
 
     def intlist(self, numbers: list[int]):
         self.s16(len(numbers))
-        [self.s32(num) for num in numbers]
+        self.pack(self.formats.intlist(len(numbers)), *numbers)
 
     def uleb128(self, value: int):
         if value == 0:
@@ -129,19 +264,38 @@ class StreamOut:
 
 
 class StreamIn:
-    def __init__(self, data: bytes, endian="<"):
+    def __init__(
+        self, data: bytes | memoryview, endian="<", pool: StringPool | None = None
+    ):
         self.endian = endian
         self.data = data
+        self.pool = pool
         self.pos = 0
         self.stack: list[int] = []
 
+    @property
+    def endian(self) -> str:
+        return self._endian
+
+    @endian.setter
+    def endian(self, value: str) -> None:
+        self._endian = value
+        self.formats = get_formats(value)
+
     def push(self):
         self.stack.append(self.pos)
 
     def pop(self):
         self.pos = self.stack.pop()
 
-    def get(self):
+    def get(self) -> bytes:
+        return bytes(self.data)
+
+    def getbuffer(self) -> bytes | memoryview:
+        """Return the underlying data without copying it
+
+        For payloads of the framing layer, this is a memoryview.
+        """
         return self.data
 
     def size(self):
@@ -167,49 +321,69 @@ class StreamIn:
     def available(self):
         return len(self.data) - self.pos
 
-    def peek(self, num):
-        if self.available() < num:
+    def peek(self, num) -> bytes:
+        if len(self.data) - self.pos < num:
             raise OverflowError("Buffer overflow")
-        return self.data[self.pos : self.pos + num]
+        return bytes(self.data[self.pos : self.pos + num])
+
+    def read(self, num) -> bytes:
+        return bytes(self.readview(num))
 
-    def read(self, num):
-        data = self.peek(num)
-        self.skip(num)
-        return data
+    def readview(self, num) -> bytes | memoryview:
+        """Read `num` bytes without copying them, if the data is a memoryview"""
+        pos = self.pos
+        end = pos + num
+        if end > len(self.data):
+            raise OverflowError("Buffer overflow")
+        self.pos = end
+        return self.data[pos:end]
 
     def readall(self):
         return self.read(self.available())
 
+    def unpack(self, format: struct.Struct) -> tuple:
+        """Unpack a precompiled struct directly from the buffer"""
+        pos = self.pos
+        end = pos + format.size
+        if end > len(self.data):
+            raise OverflowError("Buffer overflow")
+        self.pos = end
+        return format.unpack_from(self.data, pos)
+
     def pad(self, num, char=b"\0"):
-        if (self.read(num)) != char * num:
+        if (self.readview(num)) != char * num:
             raise ValueError("Incorrect padding")
 
     def ascii(self, num):
-        return self.read(num).decode("ascii")
+        return str(self.readview(num), "ascii")
 
     def u8(self):
-        return self.read(1)[0]
+        pos = self.pos
+        if pos >= len(self.data):
+            raise OverflowError("Buffer overflow")
+        self.pos = pos + 1
+        return self.data[pos]
 
     def u16(self):
-        return struct.unpack(self.endian + "H", self.read(2))[0]
+        return self.unpack(self.formats.u16)[0]
 
     def u32(self):
-        return struct.unpack(self.endian + "I", self.read(4))[0]
+        return self.unpack(self.formats.u32)[0]
 
     def u64(self):
-        return struct.unpack(self.endian + "Q", self.read(8))[0]
+        return self.unpack(self.formats.u64)[0]
 
     def s8(self):
-        return struct.unpack("b", self.read(1))[0]
+        return self.unpack(self.formats.s8)[0]
 
     def s16(self):
-        return struct.unpack(self.endian + "h", self.read(2))[0]
+        return self.unpack(self.formats.s16)[0]
 
     def s32(self):
-        return struct.unpack(self.endian + "i", self.read(4))[0]
+        return self.unpack(self.formats.s32)[0]
 
     def s64(self):
-        return struct.unpack(self.endian + "q", self.read(8))[0]
+        return self.unpack(self.formats.s64)[0]
 
     def u24(self):
         if self.endian == ">":
@@ -217,10 +391,10 @@ class StreamIn:
         return self.u8() | (self.u16() << 8)
 
     def float(self):
-        return struct.unpack(self.endian + "f", self.read(4))[0]
+        return self.unpack(self.formats.float)[0]
 
     def double(self):
-        return struct.unpack(self.endian + "d", self.read(8))[0]
+        return self.unpack(self.formats.double)[0]
 
     def bool(self):
         return bool(self.u8())
@@ -252,7 +426,11 @@ class StreamIn:
             return ""
 
         size = self.uleb128()
-        return self.read(size).decode()
+
+        if self.pool is not None and size <= self.pool.max_length:
+            return self.pool.get(self.readview(size))
+
+        return str(self.readview(size), "utf-8")
 
     def encoded_string(self) -> bytes:
         empty = self.s8() == 0x00
@@ -264,4 +442,22 @@ class StreamIn:
         return self.read(size)
 
     def intlist(self) -> list[int]:
-        return [self.s32() for num in range(self.s16())]
+        count = max(0, self.s16())
+        return list(self.unpack(self.formats.intlist(count)))
+
+    def intarray(self):
+        """Read an intlist as a numpy int32 array, without creating python integers
+
+        This requires the optional numpy dependency.
+        """
+        try:
+            import numpy  # type: ignore
+        except ImportError as exc:
+            raise RuntimeError(
+                "StreamIn.intarray requires the optional numpy "
+                "dependency. Install it with `pip install osu[numpy]`."
+            ) from exc
+
+        count = max(0, self.s16())
+        data = self.readview(count * 4)
+        return numpy.frombuffer(data, dtype=numpy.dtype(f"{self.endian}i4"))
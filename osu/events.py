@@ -22,9 +22,19 @@ class EventHandler:
     """
 
     def __init__(self) -> None:
+        self.table: list[tuple[Callable, ...]] = []
         self.handlers: dict[ServerPackets, list[Callable]] = {}
         self.executor = ThreadPoolExecutor(max_workers=10)
 
+    @property
+    def handlers(self) -> dict[ServerPackets, list[Callable]]:
+        return self._handlers
+
+    @handlers.setter
+    def handlers(self, value: dict[ServerPackets, list[Callable]]) -> None:
+        self._handlers = value
+        self.compile()
+
     def register(self, packet: ServerPackets, threaded: bool = False):
         """Register an event, that will be executed once the given server packet has been received."""
 
@@ -35,14 +45,23 @@ class EventHandler:
                 self.handlers[packet].append(f)
             else:
                 self.handlers[packet] = [f]
+            self.compile()
             return f
 
         return wrapper
 
+    def compile(self) -> None:
+        """Rebuild the lookup table of handlers, indexed by packet id.
+        This needs to be called after modifying `handlers` directly."""
+        self.table = [()] * (max(self.handlers, default=-1) + 1)
+
+        for packet, handlers in self.handlers.items():
+            self.table[packet] = tuple(handlers)
+
     def call(self, packet: ServerPackets, *args):
         """Call all events for the given packet"""
-        if packet in self.handlers:
-            for handler in self.handlers[packet]:
+        if packet < len(self.table):
+            for handler in self.table[packet]:
                 handler(*args)
 
     def _submit_future(self, f: Callable) -> Callable:
@@ -38,6 +38,7 @@ class Game:
         force_linux_emulation: bool = True,
         disable_chat_logging: bool = False,
         disable_logging: bool = False,
+        compact_players: bool = False,
     ) -> None:
         """Parameters
         -------------
@@ -77,6 +78,10 @@ class Game:
 
         `disable_logging`: bool
             Disables all logging entirely
+
+        `compact_players`: bool
+            Stores the stats of all players inside of a columnar table,
+            to reduce memory usage when tracking a lot of players
         """
 
         self.version = f"b{version}" if version else None
@@ -92,6 +97,7 @@ class Game:
         self.version_number = version
         self.disable_chat = disable_chat_logging
         self.force_linux_emulation = force_linux_emulation
+        self.compact_players = compact_players
 
         self.logger = logging.getLogger("osu!")
         self.logger.disabled = disable_logging
@@ -1,11 +1,26 @@
 from ..bancho.constants import Grade, Mode
 from ..bancho.streams import StreamIn
+from ..bancho.schema import Schema
+from ..utils import cached_enum
 
 from dataclasses import dataclass
 from datetime import datetime
 
+BeatmapInfoSchema = Schema(
+    ("id", "s16"),
+    ("beatmap_id", "s32"),
+    ("beatmapset_id", "s32"),
+    ("thread_id", "s32"),
+    ("ranked", "u8"),
+    ("osu_rank", "u8"),
+    ("fruits_rank", "u8"),
+    ("taiko_rank", "u8"),
+    ("mania_rank", "u8"),
+    ("checksum", "string"),
+)
 
-@dataclass
+
+@dataclass(slots=True)
 class BeatmapInfo:
     id: int
     beatmap_id: int
@@ -20,17 +35,24 @@ class BeatmapInfo:
 
     @classmethod
     def decode(cls, stream: StreamIn) -> "BeatmapInfo":
+        id, beatmap_id, set_id, thread_id, ranked, *ranks, checksum = (
+            BeatmapInfoSchema.decode(stream)
+        )
+        osu_rank, fruits_rank, taiko_rank, mania_rank = (
+            cached_enum(Grade, rank) for rank in ranks
+        )
+
         return BeatmapInfo(
-            stream.s16(),
-            stream.s32(),
-            stream.s32(),
-            stream.s32(),
-            stream.u8(),
-            Grade(stream.u8()),
-            Grade(stream.u8()),
-            Grade(stream.u8()),
-            Grade(stream.u8()),
-            stream.string(),
+            id,
+            beatmap_id,
+            set_id,
+            thread_id,
+            ranked,
+            osu_rank,
+            fruits_rank,
+            taiko_rank,
+            mania_rank,
+            checksum,
         )
 
 
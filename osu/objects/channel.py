@@ -2,6 +2,7 @@ from typing import TYPE_CHECKING
 
 from ..bancho.constants import ClientPackets
 from ..bancho.streams import StreamOut
+from ..utils import chat_logger
 
 if TYPE_CHECKING:
     from ..game import Game
@@ -19,8 +20,9 @@ class Channel:
         self.joined = False
         self.joining = False
 
-        self.logger = logging.getLogger(self.name)
-        self.logger.disabled = game.logger.disabled
+    @property
+    def logger(self) -> logging.Logger:
+        return chat_logger(self.name, self.game.logger.disabled)
 
     def __hash__(self) -> int:
         return hash(self.name)
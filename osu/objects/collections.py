@@ -1,20 +1,85 @@
+from collections import OrderedDict
 from collections.abc import Iterator
-from typing import TYPE_CHECKING
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, cast
 
 from ..bancho.constants import ClientPackets, PresenceFilter
 
-from .lists import LockedSet
+from .lists import SnapshotSet, SortedList
 from .channel import Channel
 from .match import Match
 from .player import Player
+from .table import PlayerTable
 
 if TYPE_CHECKING:
     from ..game import Game
 
+import time
 
-class Players(LockedSet[Player]):
-    def __init__(self, game: "Game") -> None:
+# Player fields that can be queried with `Players.where`
+IndexedFields = {
+    "beatmap_id": attrgetter("status.beatmap_id"),
+    "action": attrgetter("status.action"),
+    "mode": attrgetter("status.mode"),
+    "country_code": attrgetter("country_code"),
+    "privileges": attrgetter("privileges"),
+}
+
+# Player fields that can be ranked with `Players.top`, `ranked` & `position`
+RankedFields = ("pp", "rscore", "acc")
+
+
+class Players(SnapshotSet[Player]):
+    """Players
+    ----------
+    Collection of all players that are known to the client.
+
+    In compact mode, players are created as `TablePlayer` objects, which
+    store their stats inside of a columnar `PlayerTable`.
+
+    The fields in `IndexedFields` are indexed, and can be queried with `where`:
+    >>> game.bancho.players.where(beatmap_id=75, action=StatusAction.Playing)
+
+    Players are also ranked by the fields in `RankedFields`:
+    >>> game.bancho.players.top(50, "pp")
+
+    Players that were not looked up by any packet or user code for `ttl` seconds,
+    or the least recently used players above `capacity`, will be evicted.
+    Friends, spectators, match members and the local player are never evicted.
+
+    Attributes:
+        `compact`: bool
+
+        `table`: osu.objects.table.PlayerTable | None
+
+        `capacity`: int | None
+
+        `ttl`: float | None
+    """
+
+    def __init__(
+        self,
+        game: "Game",
+        compact: bool = False,
+        capacity: int | None = None,
+        ttl: float | None = None,
+    ) -> None:
         self.game = game
+        self.compact = compact
+        self.capacity = capacity
+        self.ttl = ttl
+        self.last_seen: OrderedDict[int, float] = OrderedDict()
+        self.table = PlayerTable() if compact else None
+        self.id_index: dict[int, Player] = {}
+        self.name_index: dict[str, Player] = {}
+        self.field_index: dict[str, dict[Any, set[Player]]] = {
+            field: {} for field in IndexedFields
+        }
+        self.field_keys: dict[int, tuple] = {}
+        self.rankings: dict[str, SortedList[tuple[Any, int]]] = {
+            field: SortedList() for field in RankedFields
+        }
+        self.ranking_keys: dict[int, tuple] = {}
         super().__init__()
 
     def __iter__(self) -> Iterator[Player]:
@@ -22,43 +87,307 @@ class Players(LockedSet[Player]):
 
     @property
     def ids(self) -> set[int]:
-        return {p.id for p in self}
+        return set(self.id_index)
 
     @property
     def pending(self) -> list[Player]:
         return [p for p in self if not p.name]
 
+    @property
+    def bounded(self) -> bool:
+        return self.capacity is not None or self.ttl is not None
+
     def add(self, item: Player) -> None:
         """Add a player to the collection"""
-        return super().add(item)
+        super().add(item)
+
+        if self.bounded:
+            self.evict()
 
     def remove(self, item: Player) -> None:
         """Remove a player from the collection"""
-        if item in self:
-            return super().remove(item)
+        return super().discard(item)
+
+    def touch(self, player: Player) -> None:
+        """Mark a player as recently used"""
+        try:
+            self.last_seen[player.id] = time.monotonic()
+            self.last_seen.move_to_end(player.id)
+        except KeyError:
+            # Player was removed in the meantime
+            pass
+
+    def pinned(self) -> set[int]:
+        """Ids of players that should never be evicted"""
+        bancho = self.game.bancho
+        ids = set(bancho.friends)
+
+        if player := getattr(bancho, "player", None):
+            ids.add(player.id)
+            ids.update(spectator.id for spectator in player.spectators)
+
+        if bancho.spectating:
+            ids.add(bancho.spectating.id)
+            ids.update(spectator.id for spectator in bancho.spectating.spectators)
+
+        if bancho.match:
+            ids.update(slot.player_id for slot in bancho.match.used_slots)
+
+        return ids
+
+    def evict(self) -> list[Player]:
+        """Remove players that exceed the capacity, or have been idle for longer than the ttl"""
+        if not self.bounded:
+            return []
+
+        now = time.monotonic()
+        deadline = now - self.ttl if self.ttl is not None else None
+        overflow = (
+            len(self.id_index) - self.capacity if self.capacity is not None else 0
+        )
+
+        pinned: set[int] | None = None
+        evicted: list[Player] = []
+        skipped = 0
+
+        while self.last_seen:
+            id, last_seen = next(iter(self.last_seen.items()))
+            expired = deadline is not None and last_seen < deadline
+
+            if overflow <= 0 and not expired:
+                break
+
+            if pinned is None:
+                pinned = self.pinned()
+
+            if not (player := self.id_index.get(id)):
+                self.last_seen.pop(id, None)
+                continue
+
+            if id in pinned:
+                # Move pinned players to the back of the queue
+                self.last_seen[id] = now
+                self.last_seen.move_to_end(id)
+                skipped += 1
+
+                if skipped > len(pinned):
+                    break
+
+                continue
+
+            self.discard(player)
+            evicted.append(player)
+            overflow -= 1
+
+        if evicted:
+            # Requesting them again would only recreate the evicted players
+            ids = [player.id for player in evicted]
+            self.game.bancho.presence_requests.discard(ids)
+            self.game.bancho.stats_requests.discard(ids)
+
+        return evicted
+
+    def create(self, id: int, name: str = "") -> Player:
+        """Create a new player object, without adding it to the collection"""
+        if self.table is not None:
+            return cast(Player, self.table.player(id, name, self.game))
+
+        return Player(id, name, self.game)
+
+    def on_add(self, item: Player) -> None:
+        self.id_index[item.id] = item
+        self.last_seen[item.id] = time.monotonic()
+
+        if item.name:
+            self.name_index[item.name] = item
+
+        self.index_fields(item)
+
+    def on_remove(self, item: Player) -> None:
+        if not (player := self.id_index.pop(item.id, None)):
+            return
+
+        self.last_seen.pop(player.id, None)
+
+        if self.name_index.get(player.name) is player:
+            del self.name_index[player.name]
+
+        self.unindex_fields(player)
+
+    def rename(self, player: Player, old_name: str) -> None:
+        """Update the name index, after a player has changed their name"""
+        with self.lock.write_context():
+            if self.id_index.get(player.id) is not player:
+                return
+
+            if self.name_index.get(old_name) is player:
+                del self.name_index[old_name]
+
+            if player.name:
+                self.name_index[player.name] = player
+
+    def index_fields(self, player: Player) -> None:
+        keys = tuple(getter(player) for getter in IndexedFields.values())
+        self.field_keys[player.id] = keys
+
+        for index, key in zip(self.field_index.values(), keys):
+            index.setdefault(key, set()).add(player)
+
+        # Sorted in descending order, with ties broken by the player id
+        scores = tuple(getattr(player, field) for field in RankedFields)
+        self.ranking_keys[player.id] = scores
+
+        for ranking, score in zip(self.rankings.values(), scores):
+            ranking.add((-score, player.id))
+
+    def unindex_fields(self, player: Player) -> None:
+        if scores := self.ranking_keys.pop(player.id, None):
+            for ranking, score in zip(self.rankings.values(), scores):
+                ranking.discard((-score, player.id))
+
+        if not (keys := self.field_keys.pop(player.id, None)):
+            return
+
+        for index, key in zip(self.field_index.values(), keys):
+            self.unindex_key(index, key, player)
+
+    def unindex_key(
+        self, index: dict[Any, set[Player]], key: Any, player: Player
+    ) -> None:
+        if not (bucket := index.get(key)):
+            return
+
+        bucket.discard(player)
+
+        if not bucket:
+            del index[key]
+
+    def reindex(self, player: Player) -> None:
+        """Update the field indexes & rankings, after the stats or presence of a player changed
+
+        Only the buckets & rankings of fields whose value changed are updated.
+        """
+        keys = tuple(getter(player) for getter in IndexedFields.values())
+        scores = tuple(getattr(player, field) for field in RankedFields)
+
+        if (
+            self.field_keys.get(player.id) == keys
+            and self.ranking_keys.get(player.id) == scores
+        ):
+            return
+
+        with self.lock.write_context():
+            if self.id_index.get(player.id) is not player:
+                return
+
+            old_keys = self.field_keys.get(player.id)
+            old_scores = self.ranking_keys.get(player.id)
+
+            if old_keys is None or old_scores is None:
+                self.unindex_fields(player)
+                self.index_fields(player)
+                return
+
+            for index, old_key, key in zip(self.field_index.values(), old_keys, keys):
+                if old_key == key:
+                    continue
+
+                self.unindex_key(index, old_key, player)
+                index.setdefault(key, set()).add(player)
+
+            for ranking, old_score, score in zip(
+                self.rankings.values(), old_scores, scores
+            ):
+                if old_score == score:
+                    continue
+
+                ranking.discard((-old_score, player.id))
+                ranking.add((-score, player.id))
+
+            self.field_keys[player.id] = keys
+            self.ranking_keys[player.id] = scores
+
+    def where(self, **fields: Any) -> list[Player]:
+        """Get all players that match the given field values, e.g.:
+        >>> players.where(country_code=5, mode=Mode.OsuMania)
+
+        Available fields: beatmap_id, action, mode, country_code, privileges
+        """
+        for field in fields:
+            if field not in IndexedFields:
+                raise ValueError(f'Field "{field}" is not indexed')
+
+        with self.lock.read_context():
+            buckets = sorted(
+                (
+                    self.field_index[field].get(value, set())
+                    for field, value in fields.items()
+                ),
+                key=len,
+            )
+
+            if not buckets:
+                return list(self.instance)
+
+            result = set(buckets[0])
+
+            for bucket in buckets[1:]:
+                if not result:
+                    break
+
+                result.intersection_update(bucket)
+
+            return list(result)
+
+    def ranking(self, field: str) -> SortedList[tuple[Any, int]]:
+        if field not in self.rankings:
+            raise ValueError(f'Field "{field}" is not ranked')
+
+        return self.rankings[field]
+
+    def ranked(self, start: int, stop: int, field: str = "pp") -> list[Player]:
+        """Get the players from position `start` to `stop`, sorted by a field in descending order"""
+        ranking = self.ranking(field)
+
+        with self.lock.read_context():
+            return [self.id_index[id] for _, id in ranking.islice(start, stop)]
+
+    def top(self, count: int, field: str = "pp") -> list[Player]:
+        """Get the best `count` players, sorted by a field in descending order"""
+        return self.ranked(0, count, field)
+
+    def position(self, player: Player, field: str = "pp") -> int | None:
+        """Get the position of a player in the ranking of a field, starting at 1"""
+        ranking = self.ranking(field)
+
+        with self.lock.read_context():
+            if not (scores := self.ranking_keys.get(player.id)):
+                return None
+
+            score = scores[RankedFields.index(field)]
+            return ranking.index((-score, player.id)) + 1
 
     def by_id(self, id: int) -> Player | None:
         """Get a player by id"""
-        for p in self.snapshot_list():
-            if p.id == id:
-                return p
-        return None
+        player = self.id_index.get(id)
+
+        if player and self.bounded:
+            self.touch(player)
+
+        return player
 
     def by_name(self, name: str) -> Player | None:
         """Get a player by name"""
-        for p in self.snapshot_list():
-            if p.name == name:
-                return p
-        return None
+        player = self.name_index.get(name)
 
-    def load(self) -> None:
-        # Split players into chunks of 255
-        player_chunks = [
-            self.pending[i : i + 255] for i in range(0, len(self.pending), 255)
-        ]
+        if player and self.bounded:
+            self.touch(player)
+
+        return player
 
-        for chunk in player_chunks:
-            self.game.bancho.request_presence([p.id for p in chunk])
+    def load(self) -> None:
+        # Requests are split into chunks of 255 by the aggregator
+        self.game.bancho.request_presence([p.id for p in self.pending])
 
     def request_updates(self, filter=PresenceFilter.All):
         """Change your presence filter and request updates from all players"""
@@ -67,7 +396,11 @@ class Players(LockedSet[Player]):
         )
 
 
-class Channels(LockedSet[Channel]):
+class Channels(SnapshotSet[Channel]):
+    def __init__(self) -> None:
+        self.name_index: dict[str, Channel] = {}
+        super().__init__()
+
     def __iter__(self) -> Iterator[Channel]:
         return super().__iter__()
 
@@ -81,20 +414,23 @@ class Channels(LockedSet[Channel]):
 
     def remove(self, item: Channel) -> None:
         """Remove a channel to the collection"""
-        if item in self:
-            return super().remove(item)
+        return super().discard(item)
+
+    def on_add(self, item: Channel) -> None:
+        self.name_index[item.name] = item
+
+    def on_remove(self, item: Channel) -> None:
+        self.name_index.pop(item.name, None)
 
     def get(self, name: str) -> Channel | None:
         """Get a channel by name"""
-        for c in self.snapshot_list():
-            if c.name == name:
-                return c
-        return None
+        return self.name_index.get(name)
 
 
-class Matches(LockedSet[Match]):
+class Matches(SnapshotSet[Match]):
     def __init__(self, game: "Game") -> None:
         self.game = game
+        self.id_index: dict[int, Match] = {}
         super().__init__()
 
     def __iter__(self) -> Iterator[Match]:
@@ -110,12 +446,14 @@ class Matches(LockedSet[Match]):
 
     def remove(self, item: Match) -> None:
         """Remove a match from the collection"""
-        if item in self:
-            return super().remove(item)
+        return super().discard(item)
+
+    def on_add(self, item: Match) -> None:
+        self.id_index[item.id] = item
+
+    def on_remove(self, item: Match) -> None:
+        self.id_index.pop(item.id, None)
 
     def by_id(self, id: int) -> Match | None:
         """Get a match by id"""
-        for match in self.snapshot_list():
-            if match.id == id:
-                return match
-        return None
+        return self.id_index.get(id)
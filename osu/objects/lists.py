@@ -2,7 +2,8 @@ from collections.abc import MutableMapping as AbstractMutableMapping
 from collections.abc import Set as AbstractSet
 from contextlib import contextmanager
 from threading import Lock, Condition
-from typing import Iterator, Optional, TypeVar, Tuple, Any, Set
+from bisect import bisect_left, insort
+from typing import Iterator, Optional, TypeVar, Tuple, Any, Set, FrozenSet, Generic
 
 T = TypeVar("T")
 K = TypeVar("K")
@@ -65,7 +66,11 @@ class ReadWriteLock:
 
 
 class LockedSet(AbstractSet[T]):
-    """A set that is thread-safe for concurrent read and write operations"""
+    """A set that is thread-safe for concurrent read and write operations
+
+    Subclasses can keep their own indexes up to date, by overriding
+    `on_add` & `on_remove`, which are called while holding the write lock.
+    """
 
     __slots__ = ("instance", "lock")
 
@@ -84,17 +89,34 @@ class LockedSet(AbstractSet[T]):
         with self.lock.read_context():
             return item in self.instance
 
+    def on_add(self, item: T) -> None:
+        """Called after an item was added to the set"""
+
+    def on_remove(self, item: T) -> None:
+        """Called after an item was removed from the set"""
+
     def add(self, item: T) -> None:
         with self.lock.write_context():
+            if item in self.instance:
+                return
+
             self.instance.add(item)
+            self.on_add(item)
 
-    def update(self, *args, **kwargs) -> None:
+    def update(self, *args) -> None:
         with self.lock.write_context():
-            self.instance.update(*args, **kwargs)
+            for items in args:
+                for item in items:
+                    if item in self.instance:
+                        continue
+
+                    self.instance.add(item)
+                    self.on_add(item)
 
     def remove(self, item: T) -> None:
         with self.lock.write_context():
             self.instance.remove(item)
+            self.on_remove(item)
 
     def snapshot(self) -> Set[T]:
         with self.lock.read_context():
@@ -110,4 +132,186 @@ class LockedSet(AbstractSet[T]):
 
     def discard(self, item: T) -> None:
         with self.lock.write_context():
+            if item not in self.instance:
+                return
+
             self.instance.discard(item)
+            self.on_remove(item)
+
+
+class SnapshotSet(LockedSet[T]):
+    """A read-mostly variant of `LockedSet`
+
+    Writers invalidate the published snapshot, which is an immutable
+    frozenset that gets rebuilt once on the next read. Readers then use
+    that snapshot without locking or copying, until the next write.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.published: FrozenSet[T] | None = None
+        self.version = 0
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.current())
+
+    def __len__(self) -> int:
+        if (published := self.published) is not None:
+            return len(published)
+        return super().__len__()
+
+    def __contains__(self, item: object) -> bool:
+        if (published := self.published) is not None:
+            return item in published
+        return super().__contains__(item)
+
+    def current(self) -> FrozenSet[T]:
+        """Get the current snapshot of this set"""
+        if (published := self.published) is not None:
+            return published
+
+        with self.lock.read_context():
+            self.published = published = frozenset(self.instance)
+
+        return published
+
+    def invalidate(self) -> None:
+        """Mark the published snapshot as outdated"""
+        self.published = None
+        self.version += 1
+
+    def add(self, item: T) -> None:
+        super().add(item)
+        self.invalidate()
+
+    def update(self, *args) -> None:
+        super().update(*args)
+        self.invalidate()
+
+    def remove(self, item: T) -> None:
+        super().remove(item)
+        self.invalidate()
+
+    def discard(self, item: T) -> None:
+        super().discard(item)
+        self.invalidate()
+
+    def snapshot(self) -> Set[T]:
+        return set(self.current())
+
+    def snapshot_list(self) -> list[T]:
+        return list(self.current())
+
+    def snapshot_without(self, excluded: T) -> list[T]:
+        return [item for item in self.current() if item != excluded]
+
+
+class SortedList(Generic[T]):
+    """A sorted list, that is split into buckets of up to `load * 2` items
+
+    Inserts & removals only shift the items of a single bucket, which keeps
+    them cheap even for large lists. Positions are resolved by bisecting the
+    bucket maximums, followed by a bisect inside of the bucket.
+    This class is not thread-safe on its own.
+    """
+
+    __slots__ = ("buckets", "maxes", "size", "load")
+
+    def __init__(self, load: int = 256) -> None:
+        self.buckets: list[list[T]] = []
+        self.maxes: list[T] = []
+        self.size = 0
+        self.load = load
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[T]:
+        for bucket in self.buckets:
+            yield from bucket
+
+    def __contains__(self, value: Any) -> bool:
+        return self.locate(value)[0] is not None
+
+    def locate(self, value: Any) -> Tuple[Optional[int], int]:
+        """Get the bucket & the position inside of the bucket for a value"""
+        index = bisect_left(self.maxes, value)
+
+        if index >= len(self.maxes):
+            return None, 0
+
+        bucket = self.buckets[index]
+        position = bisect_left(bucket, value)
+
+        if position >= len(bucket) or bucket[position] != value:
+            return None, 0
+
+        return index, position
+
+    def add(self, value: T) -> None:
+        self.size += 1
+
+        if not self.buckets:
+            self.buckets.append([value])
+            self.maxes.append(value)
+            return
+
+        index = min(bisect_left(self.maxes, value), len(self.maxes) - 1)  # type: ignore
+        bucket = self.buckets[index]
+        insort(bucket, value)  # type: ignore
+        self.maxes[index] = bucket[-1]
+
+        if len(bucket) > self.load * 2:
+            # Split the bucket in half
+            half = bucket[self.load :]
+            del bucket[self.load :]
+            self.buckets.insert(index + 1, half)
+            self.maxes[index] = bucket[-1]
+            self.maxes.insert(index + 1, half[-1])
+
+    def remove(self, value: T) -> None:
+        index, position = self.locate(value)
+
+        if index is None:
+            raise ValueError(f"{value!r} is not in list")
+
+        bucket = self.buckets[index]
+        del bucket[position]
+        self.size -= 1
+
+        if bucket:
+            self.maxes[index] = bucket[-1]
+            return
+
+        del self.buckets[index]
+        del self.maxes[index]
+
+    def discard(self, value: T) -> None:
+        if value in self:
+            self.remove(value)
+
+    def index(self, value: T) -> int:
+        """Get the position of a value in the list"""
+        index, position = self.locate(value)
+
+        if index is None:
+            raise ValueError(f"{value!r} is not in list")
+
+        return sum(len(bucket) for bucket in self.buckets[:index]) + position
+
+    def islice(self, start: int = 0, stop: int | None = None) -> Iterator[T]:
+        """Iterate over the values from `start` to `stop`"""
+        stop = self.size if stop is None else min(stop, self.size)
+
+        for bucket in self.buckets:
+            if start >= stop:
+                return
+
+            if start >= len(bucket):
+                start -= len(bucket)
+                stop -= len(bucket)
+                continue
+
+            yield from bucket[start : min(stop, len(bucket))]
+            stop -= len(bucket)
+            start = 0
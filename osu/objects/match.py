@@ -12,6 +12,8 @@ from ..bancho.constants import (
     SlotTeam,
 )
 from ..bancho.streams import StreamIn, StreamOut
+from ..bancho.schema import Schema
+from ..utils import cached_enum
 
 if TYPE_CHECKING:
     from ..game import Game
@@ -21,8 +23,34 @@ if TYPE_CHECKING:
 
 MATCH_SLOT_COUNT = 16
 
+MatchHeaderSchema = Schema(
+    ("id", "s16"),
+    ("in_progress", "bool"),
+    ("match_type", "u8"),
+    ("mods", "u32"),
+    ("name", "string"),
+    ("password", "string"),
+    ("beatmap_text", "string"),
+    ("beatmap_id", "s32"),
+    ("beatmap_checksum", "string"),
+    *((f"slot_status_{i}", "u8") for i in range(MATCH_SLOT_COUNT)),
+    *((f"slot_team_{i}", "u8") for i in range(MATCH_SLOT_COUNT)),
+)
 
-@dataclass
+MatchSettingsSchema = Schema(
+    ("host_id", "s32"),
+    ("mode", "u8"),
+    ("scoring_type", "u8"),
+    ("team_type", "u8"),
+    ("freemod", "bool"),
+)
+
+MatchSlotModsSchema = Schema(
+    *((f"slot_mods_{i}", "s32") for i in range(MATCH_SLOT_COUNT)),
+)
+
+
+@dataclass(slots=True)
 class MatchSlot:
     status: SlotStatus = SlotStatus.Open
     team: SlotTeam = SlotTeam.Neutral
@@ -235,75 +263,87 @@ class Match:
     def encode(self) -> bytes:
         self.normalize_slots()
 
-        stream = StreamOut()
-        stream.s16(self.id)
-        stream.bool(self.in_progress)
-        stream.u8(self.match_type.value)
-        stream.u32(self.mods.value)
-        stream.string(self.name)
-        stream.string(self.password)
-        stream.string(self.beatmap_text)
-        stream.s32(self.beatmap_id)
-        stream.string(self.beatmap_checksum)
-
-        for slot in self.slots:
-            stream.u8(slot.status.value)
-
-        for slot in self.slots:
-            stream.u8(slot.team.value)
+        stream = StreamOut(capacity=256)
+        MatchHeaderSchema.encode(
+            stream,
+            (
+                self.id,
+                self.in_progress,
+                self.match_type.value,
+                self.mods.value,
+                self.name,
+                self.password,
+                self.beatmap_text,
+                self.beatmap_id,
+                self.beatmap_checksum,
+                *(slot.status.value for slot in self.slots),
+                *(slot.team.value for slot in self.slots),
+            ),
+        )
 
         for slot in self.slots:
             if slot.has_player:
                 stream.s32(slot.player_id)
 
-        stream.s32(self.host_id)
-        stream.u8(self.mode.value)
-        stream.u8(self.scoring_type.value)
-        stream.u8(self.team_type.value)
-        stream.bool(self.freemod)
+        MatchSettingsSchema.encode(
+            stream,
+            (
+                self.host_id,
+                self.mode.value,
+                self.scoring_type.value,
+                self.team_type.value,
+                self.freemod,
+            ),
+        )
 
         if self.freemod:
-            for slot in self.slots:
-                stream.s32(slot.mods.value)
+            MatchSlotModsSchema.encode(stream, [slot.mods.value for slot in self.slots])
 
         stream.s32(self.seed)
         return stream.get()
 
     @classmethod
     def decode(cls, stream: StreamIn, game: "Game | None" = None) -> "Match":
+        header = MatchHeaderSchema.decode(stream)
+        statuses = header[9 : 9 + MATCH_SLOT_COUNT]
+        teams = header[9 + MATCH_SLOT_COUNT :]
+
         match = Match(
-            id=stream.s16(),
-            in_progress=stream.bool(),
-            match_type=MatchType(stream.u8()),
-            mods=Mods(stream.u32()),
-            name=stream.string(),
-            password=stream.string(),
-            beatmap_text=stream.string(),
-            beatmap_id=stream.s32(),
-            beatmap_checksum=stream.string(),
+            id=header[0],
+            in_progress=header[1],
+            match_type=cached_enum(MatchType, header[2]),
+            mods=cached_enum(Mods, header[3]),
+            name=header[4],
+            password=header[5],
+            beatmap_text=header[6],
+            beatmap_id=header[7],
+            beatmap_checksum=header[8],
+            slots=[
+                MatchSlot(
+                    status=cached_enum(SlotStatus, status),
+                    team=cached_enum(SlotTeam, team),
+                )
+                for status, team in zip(statuses, teams)
+            ],
             game=game,
         )
 
-        match.slots = [
-            MatchSlot(status=SlotStatus(stream.u8())) for _ in range(MATCH_SLOT_COUNT)
-        ]
-
-        for slot in match.slots:
-            slot.team = SlotTeam(stream.u8())
-
         for slot in match.slots:
             if slot.has_player:
                 slot.player_id = stream.s32()
 
-        match.host_id = stream.s32()
-        match.mode = Mode(max(0, min(3, stream.u8())))
-        match.scoring_type = MatchScoringType(stream.u8())
-        match.team_type = MatchTeamType(stream.u8())
-        match.freemod = stream.bool()
+        host_id, mode, scoring_type, team_type, freemod = MatchSettingsSchema.decode(
+            stream
+        )
+        match.host_id = host_id
+        match.mode = cached_enum(Mode, max(0, min(3, mode)))
+        match.scoring_type = cached_enum(MatchScoringType, scoring_type)
+        match.team_type = cached_enum(MatchTeamType, team_type)
+        match.freemod = freemod
 
         if match.freemod:
-            for slot in match.slots:
-                slot.mods = Mods(stream.s32())
+            for slot, mods in zip(match.slots, MatchSlotModsSchema.decode(stream)):
+                slot.mods = cached_enum(Mods, mods)
 
         match.seed = stream.s32()
         return match
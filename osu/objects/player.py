@@ -1,46 +1,62 @@
-from typing import TYPE_CHECKING
-
-from ..bancho.constants import ClientPackets, CountryCodes, LevelGraph, Privileges, Mode
+from typing import TYPE_CHECKING, cast
+
+from ..bancho.constants import (
+    ClientPackets,
+    CountryAcronyms,
+    LevelGraph,
+    Privileges,
+    Mode,
+)
 from ..bancho.streams import StreamOut
+from ..utils import chat_logger
 
 from .status import Status
 
 if TYPE_CHECKING:
     from ..game import Game
 
+from abc import ABCMeta
+from bisect import bisect_right
+
 import logging
 
 
-class Player:
-    def __init__(self, id: int, name: str, game: "Game") -> None:
-        self.id = id
-        self.name = name
-        self.game = game
+class BasePlayer(metaclass=ABCMeta):
+    """Behaviour that is shared by every kind of player object
 
-        self.timezone = 0
-        self.country_code = 0
-        self.longitude = 0.0
-        self.latitude = 0.0
+    The attributes are stored by the subclasses, see `Player` and
+    `osu.objects.table.TablePlayer`.
+    """
 
-        self.status = Status()
-        self.rscore = 0
-        self.acc = 100.0
-        self.playcount = 0
-        self.tscore = 0
-        self.rank = 0
-        self.pp = 0
+    __slots__ = ()
 
-        self.privileges: Privileges = Privileges.Normal
-        self.spectators: set[Player] = set()
+    id: int
+    _name: str
+    game: "Game"
 
-        self.cant_spectate = False
-        self.silenced = False
-        self.dms_blocked = False
+    timezone: int
+    country_code: int
+    longitude: float
+    latitude: float
 
-        self.last_status = Status()
+    status: Status
+    rscore: int
+    acc: float
+    playcount: int
+    tscore: int
+    rank: int
+    pp: int
+
+    privileges: Privileges
+    spectators: set["Player"]
 
-        self.logger = logging.getLogger(self.name)
-        self.logger.disabled = game.logger.disabled
+    cant_spectate: bool
+    silenced: bool
+    dms_blocked: bool
+
+    last_status: Status
+    stats_fingerprint: bytes
+    presence_fingerprint: bytes
 
     def __repr__(self) -> str:
         return f'<Player "{self.name}" ({self.id})>'
@@ -49,10 +65,25 @@ class Player:
         return self.id
 
     def __eq__(self, other: object) -> bool:
-        if not isinstance(other, Player):
+        if not isinstance(other, BasePlayer):
             return NotImplemented
         return self.id == other.id
 
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @name.setter
+    def name(self, value: str) -> None:
+        old_name, self._name = self._name, value  # type: ignore[misc]
+
+        if old_name != value:
+            self.game.bancho.players.rename(cast("Player", self), old_name)
+
+    @property
+    def logger(self) -> logging.Logger:
+        return chat_logger(self.name, self.game.logger.disabled)
+
     @property
     def mode(self) -> Mode:
         return self.status.mode
@@ -67,7 +98,7 @@ class Player:
 
     @property
     def country(self) -> str:
-        return list(CountryCodes.keys())[self.country_code]
+        return CountryAcronyms[self.country_code]
 
     @property
     def level(self) -> int:
@@ -77,11 +108,8 @@ class Player:
         if self.tscore >= LevelGraph[-1]:
             return 100 + int((self.tscore - LevelGraph[99]) / 100000000000)
 
-        for idx, v in enumerate(LevelGraph, start=0):
-            if v > self.tscore:
-                return idx
-
-        return 1
+        # Index of the first level that requires more score
+        return bisect_right(LevelGraph, self.tscore)
 
     def request_presence(self) -> None:
         """Request a presence update for this player"""
@@ -146,3 +174,62 @@ class Player:
         self.game.bancho.enqueue(
             ClientPackets.FRIEND_REMOVE, int(self.id).to_bytes(4, "little")
         )
+
+
+class Player(BasePlayer):
+    __slots__ = (
+        "id",
+        "_name",
+        "game",
+        "timezone",
+        "country_code",
+        "longitude",
+        "latitude",
+        "status",
+        "rscore",
+        "acc",
+        "playcount",
+        "tscore",
+        "rank",
+        "pp",
+        "privileges",
+        "spectators",
+        "cant_spectate",
+        "silenced",
+        "dms_blocked",
+        "last_status",
+        "stats_fingerprint",
+        "presence_fingerprint",
+    )
+
+    def __init__(self, id: int, name: str, game: "Game") -> None:
+        self.id = id
+        self._name = name
+        self.game = game
+
+        self.timezone = 0
+        self.country_code = 0
+        self.longitude = 0.0
+        self.latitude = 0.0
+
+        self.status = Status()
+        self.rscore = 0
+        self.acc = 100.0
+        self.playcount = 0
+        self.tscore = 0
+        self.rank = 0
+        self.pp = 0
+
+        self.privileges = Privileges.Normal
+        self.spectators = set()
+
+        self.cant_spectate = False
+        self.silenced = False
+        self.dms_blocked = False
+
+        self.last_status = Status()
+
+        # Raw payloads of the last stats & presence packets,
+        # used to skip decoding them when they didn't change
+        self.stats_fingerprint = b""
+        self.presence_fingerprint = b""
@@ -2,9 +2,42 @@ from dataclasses import dataclass
 
 from ..bancho.streams import StreamIn, StreamOut
 from ..bancho.constants import ButtonState
+from ..bancho.schema import Schema
+from ..utils import cached_enum
 
+ReplayFrameSchema = Schema(
+    ("button_state", "u8"),
+    ("legacy_byte", "u8"),
+    ("x", "float"),
+    ("y", "float"),
+    ("time", "s32"),
+)
 
-@dataclass
+ScoreFrameSchema = Schema(
+    ("time", "s32"),
+    ("id", "u8"),
+    ("c300", "u16"),
+    ("c100", "u16"),
+    ("c50", "u16"),
+    ("cGeki", "u16"),
+    ("cKatu", "u16"),
+    ("cMiss", "u16"),
+    ("total_score", "s32"),
+    ("max_combo", "u16"),
+    ("current_combo", "u16"),
+    ("perfect", "bool"),
+    ("current_hp", "u8"),
+    ("tag_byte", "u8"),
+    ("score_v2", "bool"),
+)
+
+ScoreV2Schema = Schema(
+    ("combo_portion", "double"),
+    ("bonus_portion", "double"),
+)
+
+
+@dataclass(slots=True)
 class ReplayFrame:
     button_state: ButtonState
     time: int
@@ -12,32 +45,30 @@ class ReplayFrame:
     y: float
 
     def encode(self) -> bytes:
-        stream = StreamOut()
-        stream.u8(self.button_state.value)
-        stream.u8(0)  # unused
-        stream.float(self.x)
-        stream.float(self.y)
-        stream.s32(self.time)
+        stream = StreamOut(capacity=ReplayFrameSchema.size)
+        self.encode_into(stream)
         return stream.get()
 
+    def encode_into(self, stream: StreamOut) -> None:
+        ReplayFrameSchema.encode(
+            stream,
+            # The legacy byte is unused
+            (self.button_state.value, 0, self.x, self.y, self.time),
+        )
+
     @classmethod
     def decode(cls, stream: StreamIn) -> "ReplayFrame":
-        button_state = ButtonState(stream.u8())
+        button_state, legacy_byte, x, y, time = ReplayFrameSchema.decode(stream)
 
         # This byte is now unused and was replaced by the ButtonState flag
         # It's only kept here, because of legacy replay support
-        if stream.u8() > 0:
-            if ButtonState.Right1 not in button_state:
-                button_state |= ButtonState.Right1
-
-        x = stream.float()
-        y = stream.float()
-        time = stream.s32()
+        if legacy_byte > 0:
+            button_state |= ButtonState.Right1.value
 
-        return ReplayFrame(button_state, time, x, y)
+        return ReplayFrame(cached_enum(ButtonState, button_state), time, x, y)
 
 
-@dataclass
+@dataclass(slots=True)
 class ScoreFrame:
     time: int
     id: int
@@ -62,45 +93,39 @@ class ScoreFrame:
         return self.c50 + self.c100 + self.c300 + self.cMiss
 
     def encode(self) -> bytes:
-        stream = StreamOut()
-        stream.s32(self.time)
-        stream.u8(self.id)
-        stream.u16(self.c300)
-        stream.u16(self.c100)
-        stream.u16(self.c50)
-        stream.u16(self.cGeki)
-        stream.u16(self.cKatu)
-        stream.u16(self.cMiss)
-        stream.s32(self.total_score)
-        stream.u16(self.max_combo)
-        stream.u16(self.current_combo)
-        stream.bool(self.perfect)
-        stream.u8(self.current_hp)
-        stream.u8(self.tag_byte)
-        stream.bool(self.score_v2)
-        if self.score_v2:
-            stream.double(self.combo_portion)
-            stream.double(self.bonus_portion)
+        stream = StreamOut(capacity=ScoreFrameSchema.size + ScoreV2Schema.size)
+        self.encode_into(stream)
         return stream.get()
 
+    def encode_into(self, stream: StreamOut) -> None:
+        ScoreFrameSchema.encode(
+            stream,
+            (
+                self.time,
+                self.id,
+                self.c300,
+                self.c100,
+                self.c50,
+                self.cGeki,
+                self.cKatu,
+                self.cMiss,
+                self.total_score,
+                self.max_combo,
+                self.current_combo,
+                self.perfect,
+                self.current_hp,
+                self.tag_byte,
+                self.score_v2,
+            ),
+        )
+        if self.score_v2:
+            ScoreV2Schema.encode(stream, (self.combo_portion, self.bonus_portion))
+
     @classmethod
     def decode(cls, stream: StreamIn) -> "ScoreFrame":
-        return ScoreFrame(
-            stream.s32(),
-            stream.u8(),
-            stream.u16(),
-            stream.u16(),
-            stream.u16(),
-            stream.u16(),
-            stream.u16(),
-            stream.u16(),
-            stream.s32(),
-            stream.u16(),
-            stream.u16(),
-            stream.bool(),
-            stream.u8(),
-            stream.u8(),
-            v2 := stream.bool(),
-            stream.double() if v2 else 0.0,
-            stream.double() if v2 else 0.0,
-        )
+        frame = ScoreFrame(*ScoreFrameSchema.decode(stream))
+
+        if frame.score_v2:
+            frame.combo_portion, frame.bonus_portion = ScoreV2Schema.decode(stream)
+
+        return frame
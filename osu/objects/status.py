@@ -3,7 +3,7 @@ from dataclasses import dataclass
 from ..bancho.constants import StatusAction, Mode, Mods
 
 
-@dataclass
+@dataclass(slots=True)
 class Status:
     action: StatusAction = StatusAction.Idle
     text: str = ""
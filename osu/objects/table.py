@@ -0,0 +1,269 @@
+from collections.abc import Callable, MutableSequence
+from typing import TYPE_CHECKING, Any
+from array import array
+
+from ..bancho.constants import StatusAction, Privileges, Mode, Mods
+from ..utils import cached_enum
+
+from .player import BasePlayer, Player
+from .status import Status
+
+if TYPE_CHECKING:
+    from ..game import Game
+
+from functools import partial
+from copy import copy
+from enum import Enum
+
+
+class PlayerTable:
+    """PlayerTable
+    --------------
+    Columnar storage for the stats of a large amount of players.
+
+    Numeric columns are typed arrays, and every other column is a list.
+    Every player that was created from the table owns one row, identified
+    by a dense slot id, until the player object is garbage collected.
+    Columns can be scanned directly, e.g.:
+    >>> table = game.bancho.players.table
+    >>> pp = table.column("pp")
+    >>> best = max(range(len(pp)), key=pp.__getitem__)
+    >>> game.bancho.players.by_id(table.column("id")[best])
+
+    Attributes:
+        `data`: dict[str, array | list] (Columns, indexed by slot id)
+
+        `spectators`: dict[int, set[Player]] (Spectators of every slot that has any)
+
+        `player`: type[TablePlayer] (Player class, that stores its stats in this table)
+    """
+
+    # Column name -> array typecode, or None for python objects
+    columns: dict[str, str | None] = {
+        "id": "i",
+        "timezone": "h",
+        "country_code": "B",
+        "longitude": "f",
+        "latitude": "f",
+        "rscore": "q",
+        "acc": "f",
+        "playcount": "i",
+        "tscore": "q",
+        "rank": "i",
+        "pp": "i",
+        "privileges": "B",
+        "cant_spectate": "B",
+        "silenced": "B",
+        "dms_blocked": "B",
+        "action": "B",
+        "mode": "B",
+        "mods": "I",
+        "beatmap_id": "i",
+        "text": None,
+        "checksum": None,
+        "last_status": None,
+        "stats_fingerprint": None,
+        "presence_fingerprint": None,
+    }
+
+    # Initial value of every column, that does not start at zero
+    defaults: dict[str, Any] = {
+        "acc": 100.0,
+        "privileges": Privileges.Normal,
+        "text": "",
+        "checksum": "",
+        "last_status": None,
+        "stats_fingerprint": b"",
+        "presence_fingerprint": b"",
+    }
+
+    def __init__(self) -> None:
+        self.data: dict[str, MutableSequence[Any]] = {
+            name: array(code) if code else [] for name, code in self.columns.items()
+        }
+        self.spectators: dict[int, set[Player]] = {}
+        self.free: list[int] = []
+        self.size = 0
+
+        # Every table has its own player class, so that the
+        # player objects don't need to store a reference to it
+        self.player: type[TablePlayer] = type(
+            "TablePlayer", (TablePlayer,), {"__slots__": (), "table": self}
+        )
+
+    def __len__(self) -> int:
+        return self.size - len(self.free)
+
+    def column(self, name: str) -> MutableSequence[Any]:
+        """Get a column, indexed by slot id"""
+        return self.data[name]
+
+    def allocate(self, id: int) -> int:
+        """Reserve a row for a player and return its slot id"""
+        if self.free:
+            slot = self.free.pop()
+            self.data["id"][slot] = id
+            return slot
+
+        slot = self.size
+        self.size += 1
+
+        for name, column in self.data.items():
+            column.append(self.defaults.get(name, 0))
+
+        self.data["id"][slot] = id
+        return slot
+
+    def release(self, slot: int) -> None:
+        """Reset the row of a player, so that it can be reused"""
+        for name, column in self.data.items():
+            column[slot] = self.defaults.get(name, 0)
+
+        self.spectators.pop(slot, None)
+        self.free.append(slot)
+
+
+class TableColumn:
+    """Descriptor that reads & writes an attribute from the row of a `PlayerTable`"""
+
+    def __init__(self, column: str, convert: Callable[[Any], Any] | None = None):
+        self.column = column
+        self.convert = convert
+
+    def __get__(self, instance: Any, owner: type | None = None) -> Any:
+        if instance is None:
+            return self
+
+        value = instance.table.data[self.column][instance.slot]
+        return self.convert(value) if self.convert else value
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        if isinstance(value, Enum):
+            value = value.value
+
+        instance.table.data[self.column][instance.slot] = value
+
+
+class TableStatus(Status):
+    """A view of the `Status` fields in a `PlayerTable` row
+
+    It is created on every access of `TablePlayer.status`, so it should
+    not be kept around. Use `copy` to get a detached `Status` instead.
+    """
+
+    __slots__ = ("table", "slot")
+
+    action = TableColumn("action", partial(cached_enum, StatusAction))
+    text = TableColumn("text")
+    checksum = TableColumn("checksum")
+    mods = TableColumn("mods", partial(cached_enum, Mods))
+    mode = TableColumn("mode", partial(cached_enum, Mode))
+    beatmap_id = TableColumn("beatmap_id")
+
+    def __init__(self, table: PlayerTable, slot: int) -> None:
+        self.table = table
+        self.slot = slot
+
+    def __copy__(self) -> Status:
+        return Status(
+            self.action,
+            self.text,
+            self.checksum,
+            self.mods,
+            self.mode,
+            self.beatmap_id,
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Status):
+            return NotImplemented
+        return (
+            self.action == other.action
+            and self.text == other.text
+            and self.checksum == other.checksum
+            and self.mods == other.mods
+            and self.mode == other.mode
+            and self.beatmap_id == other.beatmap_id
+        )
+
+    def assign(self, status: Status) -> None:
+        """Overwrite every field with the fields of another status"""
+        self.action = status.action
+        self.text = status.text
+        self.checksum = status.checksum
+        self.mods = status.mods
+        self.mode = status.mode
+        self.beatmap_id = status.beatmap_id
+
+
+class TablePlayer(BasePlayer):
+    """A player that stores everything but its id & name in a `PlayerTable` row
+
+    Instances are created with the `player` class of a table, which
+    allocates a row on creation and frees it when the object is collected.
+    """
+
+    __slots__ = ("id", "_name", "game", "slot")
+
+    table: PlayerTable
+
+    timezone = TableColumn("timezone")
+    country_code = TableColumn("country_code")
+    longitude = TableColumn("longitude")
+    latitude = TableColumn("latitude")
+    rscore = TableColumn("rscore")
+    acc = TableColumn("acc")
+    playcount = TableColumn("playcount")
+    tscore = TableColumn("tscore")
+    rank = TableColumn("rank")
+    pp = TableColumn("pp")
+    privileges = TableColumn("privileges", partial(cached_enum, Privileges))
+    cant_spectate = TableColumn("cant_spectate", bool)
+    silenced = TableColumn("silenced", bool)
+    dms_blocked = TableColumn("dms_blocked", bool)
+    stats_fingerprint = TableColumn("stats_fingerprint")
+    presence_fingerprint = TableColumn("presence_fingerprint")
+
+    def __init__(self, id: int, name: str, game: "Game") -> None:
+        self.slot = -1
+        self.id = id
+        self._name = name
+        self.game = game
+        self.slot = self.table.allocate(id)
+
+    def __del__(self) -> None:
+        if self.slot >= 0:
+            self.table.release(self.slot)
+
+    @property  # type: ignore[override]
+    def status(self) -> Status:
+        return TableStatus(self.table, self.slot)
+
+    @status.setter
+    def status(self, value: Status) -> None:
+        TableStatus(self.table, self.slot).assign(value)
+
+    @property  # type: ignore[override]
+    def last_status(self) -> Status:
+        return self.table.data["last_status"][self.slot] or Status()
+
+    @last_status.setter
+    def last_status(self, value: Status) -> None:
+        if isinstance(value, TableStatus):
+            # Views would change together with the row
+            value = copy(value)
+
+        self.table.data["last_status"][self.slot] = value
+
+    @property  # type: ignore[override]
+    def spectators(self) -> set[Player]:
+        # Only allocated once the player has a spectator
+        return self.table.spectators.setdefault(self.slot, set())
+
+    @spectators.setter
+    def spectators(self, value: set[Player]) -> None:
+        self.table.spectators[self.slot] = value
+
+
+# Objects of a table are treated as players everywhere
+Player.register(TablePlayer)
@@ -1,5 +1,14 @@
+from typing import Any, TypeVar
+from enum import Enum
+
 import functools
 import warnings
+import logging
+
+E = TypeVar("E", bound=Enum)
+
+# (Enum type, value) -> member
+EnumCache: dict[tuple[type, Any], Any] = {}
 
 
 def deprecated(func):
@@ -13,3 +22,48 @@ def deprecated(func):
         return func(*args, **kwargs)
 
     return wrapper
+
+
+class ChatLogger(logging.Logger):
+    """Logger for players & channels, that is not registered in the logging manager
+
+    Registered loggers are kept alive forever, which would grow without bound
+    for every player and channel name that was seen. These loggers are only
+    referenced by the `chat_logger` cache, and will propagate to the root logger.
+    """
+
+    def __init__(self, name: str, disabled: bool = False) -> None:
+        super().__init__(name)
+        self.parent = logging.root
+        self.disabled = disabled
+
+    def isEnabledFor(self, level: int) -> bool:
+        # The logging manager only clears the level cache of registered loggers
+        if self.disabled or self.manager.disable >= level:
+            return False
+
+        return level >= self.getEffectiveLevel()
+
+
+@functools.lru_cache(maxsize=1024)
+def chat_logger(name: str, disabled: bool = False) -> ChatLogger:
+    """Get a bounded, cached logger for a player or channel name"""
+    return ChatLogger(name, disabled)
+
+
+def cached_enum(enum: type[E], value: Any) -> E:
+    """Get an enum member from a bounded cache
+
+    Constructing composite flags, like `Mods(72)`, is a lot slower
+    than a dict lookup, so decoders should prefer this over `enum(value)`.
+    """
+    try:
+        return EnumCache[enum, value]
+    except KeyError:
+        member = enum(value)
+
+    if len(EnumCache) >= 4096:
+        EnumCache.clear()
+
+    EnumCache[enum, value] = member
+    return member
@@ -1,5 +1,12 @@
 from osu import Game
+from osu.bancho.constants import ClientPackets, Priority
+from osu.bancho.framing import PacketParser, iter_packets
+from osu.bancho.outbound import OutboundQueue, collapse_packets, encode_packet
+from osu.bancho.streams import StreamIn, StreamOut
+from osu.objects.lists import SortedList
+
 import logging
+import random
 
 logging.basicConfig(
     level=logging.DEBUG, format="[%(asctime)s] - <%(name)s> %(levelname)s: %(message)s"
@@ -68,8 +75,162 @@ def packets():
         logger.error("Login reply packet failed.")
         exit(1)
 
-    # TODO: More packets?
+
+def framing():
+    logger.info("Testing packet parser with random chunks...")
+    rng = random.Random(0)
+
+    packets = [
+        (rng.randrange(0, 110), False, rng.randbytes(rng.randrange(0, 300)))
+        for _ in range(200)
+    ]
+    data = b"".join(encode_packet(id, payload) for id, _, payload in packets)
+    expected = [(id, c, bytes(p)) for id, c, p in iter_packets(data)]
+
+    if expected != packets:
+        logger.error("Packets were not split correctly.")
+        exit(1)
+
+    for _ in range(50):
+        parser = PacketParser()
+        result = []
+        offset = 0
+
+        while offset < len(data):
+            size = rng.randrange(1, 512)
+            chunk = data[offset : offset + size]
+            result += [(id, c, bytes(p)) for id, c, p in parser.feed(chunk)]
+            offset += size
+
+        if result != expected or parser.pending:
+            logger.error("Packet parser failed to reassemble chunked packets.")
+            exit(1)
+
+    logger.info("Packet parser works as expected.")
+
+
+def sorted_list():
+    logger.info("Testing sorted list...")
+    rng = random.Random(1)
+    items = SortedList[tuple[int, int]]()
+    reference = []
+
+    for _ in range(5000):
+        value = (rng.randrange(-100, 100), rng.randrange(1000))
+
+        if reference and rng.random() < 0.4:
+            value = rng.choice(reference)
+            items.remove(value)
+            reference.remove(value)
+            continue
+
+        items.add(value)
+        reference.append(value)
+
+    reference.sort()
+
+    if list(items) != reference or len(items) != len(reference):
+        logger.error("Sorted list is out of order.")
+        exit(1)
+
+    for _ in range(100):
+        value = rng.choice(reference)
+        start = rng.randrange(len(reference))
+
+        if items.index(value) != reference.index(value):
+            logger.error("Sorted list returned a wrong index.")
+            exit(1)
+
+        if list(items.islice(start, start + 10)) != reference[start : start + 10]:
+            logger.error("Sorted list returned a wrong slice.")
+            exit(1)
+
+    logger.info("Sorted list works as expected.")
+
+
+def outbound():
+    logger.info("Testing outbound packet queue...")
+
+    def request(packet: ClientPackets, ids: list[int]) -> bytes:
+        stream = StreamOut()
+        stream.intlist(ids)
+        return encode_packet(packet, stream.get())
+
+    action = [encode_packet(ClientPackets.CHANGE_ACTION, bytes([i])) for i in range(3)]
+    message = encode_packet(ClientPackets.SEND_PUBLIC_MESSAGE, b"hi")
+    ping = encode_packet(ClientPackets.PING, b"")
+
+    batch = collapse_packets(
+        [
+            action[0],
+            request(ClientPackets.USER_STATS_REQUEST, [1, 2]),
+            ping,
+            message,
+            action[1],
+            request(ClientPackets.USER_STATS_REQUEST, [2, 3]),
+            ping,
+            message,
+            action[2],
+        ]
+    )
+    expected = [
+        request(ClientPackets.USER_STATS_REQUEST, [1, 2, 3]),
+        ping,
+        message,
+        message,
+        action[2],
+    ]
+
+    if batch != expected:
+        logger.error("Outbound packets were not collapsed correctly.")
+        exit(1)
+
+    ids = [
+        id
+        for data in collapse_packets(
+            [request(ClientPackets.USER_PRESENCE_REQUEST, list(range(600)))]
+        )
+        for _, _, payload in iter_packets(data)
+        for id in StreamIn(payload).intlist()
+    ]
+
+    if ids != list(range(600)):
+        logger.error("Merged requests were not split correctly.")
+        exit(1)
+
+    queue = OutboundQueue()
+    queue.put(b"bulk", Priority.Bulk)
+    queue.put(b"chat", Priority.Chat)
+    queue.put(b"control", Priority.Control)
+    queue.put(b"logout", Priority.Final)
+    queue.put(b"join", Priority.Match)
+
+    if queue.drain() != [b"control", b"chat", b"bulk", b"logout"]:
+        logger.error("Outbound queue did not drain by priority.")
+        exit(1)
+
+    if queue.drain() != [b"join"] or not queue.empty():
+        logger.error("Packets after a final packet were not held back.")
+        exit(1)
+
+    queue.limit(Priority.Bulk, 1, 2)
+
+    for i in range(5):
+        queue.put(bytes([i]), Priority.Bulk)
+
+    if queue.drain() != [b"\x00", b"\x01"] or queue.qsize() != 3:
+        logger.error("Outbound queue did not apply the rate limit.")
+        exit(1)
+
+    if not 0 < queue.delay() <= 1:
+        logger.error("Outbound queue returned a wrong delay.")
+        exit(1)
+
+    logger.info("Outbound queue works as expected.")
 
 
 tasks()
 packets()
+framing()
+sorted_list()
+outbound()